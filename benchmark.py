@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# __coconut_hash__ = 0xfc5f57f7
+
+# Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
+
+# Coconut Header: -------------------------------------------------------------
+
+import sys as _coconut_sys, os.path as _coconut_os_path
+_coconut_file_path = _coconut_os_path.dirname(_coconut_os_path.abspath(__file__))
+_coconut_cached_module = _coconut_sys.modules.get("__coconut__")
+if _coconut_cached_module is not None and _coconut_os_path.dirname(_coconut_cached_module.__file__) != _coconut_file_path:
+    del _coconut_sys.modules["__coconut__"]
+_coconut_sys.path.insert(0, _coconut_file_path)
+from __coconut__ import _coconut, _coconut_NamedTuple, _coconut_MatchError, _coconut_tail_call, _coconut_tco, _coconut_igetitem, _coconut_base_compose, _coconut_forward_compose, _coconut_back_compose, _coconut_forward_star_compose, _coconut_back_star_compose, _coconut_pipe, _coconut_star_pipe, _coconut_back_pipe, _coconut_back_star_pipe, _coconut_bool_and, _coconut_bool_or, _coconut_none_coalesce, _coconut_minus, _coconut_map, _coconut_partial
+from __coconut__ import *
+_coconut_sys.path.remove(_coconut_file_path)
+
+# Compiled Coconut: -----------------------------------------------------------
+
+# -*- coding: utf-8 -*-
+# Copyright Arne Bachmann
+
+# Benchmark suite for all scoring layers, writing machine-readable results to compare between versions
+# Usage: python benchmark.py [--quick] [--output results.json] [--compare previous.json]
+# Exits with code 1 if importing rese.sunamount exceeds its time budget
+
+
+# Standard modules
+import datetime  # for the benchmark date
+import json  # for machine-readable results
+import os  # for the import benchmark's environment
+import platform  # for the machine description
+import subprocess  # for the import benchmark in fresh interpreters
+sys = _coconut_sys  # for command line arguments
+import time  # for timing
+
+# Dependencies (install via "pip install pytz")
+import pytz
+
+# Custom module
+from rese.sunamount import *
+
+
+# Constants
+location = Location(53.4613331, 9.8276266, 20.)
+timezone = pytz.timezone("Europe/Berlin")
+allWindows = [Window(-135., Room(0., 1.), 2.), Window(45., Room(0., .5), 2.), Window(-45., Room(0., .5), .3), Window(-10., Room(3., .8), 1.), Window(80., Room(3., .3), 1.5), Window(170., Room(6., .6), 1.), Window(-80., Room(6., 1.), 2.), Window(10., Room(6., .4), .5)]
+allTimes = [TimeInterval(7., 9., 7. / 7.), TimeInterval(16., 22.5, 7 / 7.), TimeInterval(9., 16., 2. / 7), TimeInterval(11., 13., 5. / 7.)]
+IMPORT_BUDGET = .02  # type: float  # seconds for importing rese.sunamount on top of its dependency numpy
+obstacleGrid = [Obstacle(float(direction), 10. + (direction % 7) * 15., 5. + direction % 11, 3. + direction % 13, .5 + (direction % 5) / 10.) for direction in range(-180, 180, 3)]  # deterministic urban surroundings
+
+
+# Functions
+def clearCaches() -> 'None':
+    ''' Drops memoized intermediate results, so that scoring functions are measured without reusing earlier computations. '''
+    memoize.clearAll()  # e.g. ephemerides, midnights, UTC offsets and day tables
+
+
+def measure(func: '_coconut.typing.Callable[[], Any]', repeat: 'int'=3, number: 'int'=1, setup: '_coconut.typing.Callable[[], _coconut.typing.Optional[Any]]'=None) -> 'float':
+    ''' Times a function like timeit, returning the best of several repetitions to reduce noise.
+      setup: optional function to call before each repetition (not timed)
+      returns: seconds per call
+
+  >>> measure(lambda: None, 2, 10) < 1e-3
+  True
+  '''
+    best = float("inf")  # type: float
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+@_coconut_tco
+def measureImport(module: 'str', repeat: 'int'=5) -> 'float':
+    ''' Times importing a module in fresh interpreters, with byte-code caching as after installation.
+      returns: seconds of the fastest import
+
+  >>> measureImport("json", 1) < 1.
+  True
+  '''
+    environment = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}  # type: Dict[str, str]
+    code = "import time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)".format(module)  # type: str
+    return _coconut_tail_call(min, (float(subprocess.check_output([sys.executable, "-c", code], env=environment, cwd=os.path.dirname(os.path.abspath(__file__)))) for _ in range(repeat + 1)))  # the first run may write byte-code
+
+
+def getImportOverhead(results: 'Dict[str, Any]') -> 'float':
+    ''' returns: seconds for importing rese.sunamount on top of numpy, to compare with IMPORT_BUDGET
+
+  >>> getImportOverhead({"results": [{"name": "import", "parameters": {"module": "numpy"}, "seconds": .1}, {"name": "import", "parameters": {"module": "rese.sunamount"}, "seconds": .11}]}) < IMPORT_BUDGET
+  True
+  '''
+    seconds = {result["parameters"]["module"]: result["seconds"] for result in results["results"] if result["name"] == "import"}  # type: Dict[str, float]
+    return seconds["rese.sunamount"] - seconds["numpy"]
+
+
+def getBenchmarks(quick: 'bool'=False) -> 'List[Tuple[str, Dict[str, Any], _coconut.typing.Callable[[], Any], int]]':
+    ''' Defines all benchmarks with their scaling parameters, from a single shadowing computation up to entire house scores.
+      The benchmarked functions are partial applications, binding the current loop parameters.
+      quick: run fewer and smaller cases, e.g. for testing
+      returns: list of benchmark name, parameters, function and number of calls per repetition
+  '''
+    date = tz_datetime(CEST)(REF_YEAR, 6, 1)
+    benchmarks = [("getShadowing", {}, _coconut.functools.partial(getShadowing, 24, 90, Obstacle(91, 10, 2, 5)), 10000), ("getAngleCorrectionRoomFactor", {}, _coconut.functools.partial(getAngleCorrectionRoomFactor, 10., -20., 2.), 10000), ("getAngleCorrectedSunWattage", {}, _coconut.functools.partial(getAngleCorrectedSunWattage, date.replace(hour=12), location, Window(0.)), 100)]
+    for steps in ([5] if quick else [1, 5, 15, 60]):
+        benchmarks.append(("getTimeNormalizedSunWattage", {"minute_steps": steps}, _coconut.functools.partial(getTimeNormalizedSunWattage, date, location, Window(0.), TimeInterval(6., 21.), obstacleGrid[:4], steps), 10))
+    for obstacles in ([0, 4] if quick else [0, 1, 4, 16, 64, 120]):
+        benchmarks.append(("getDailySunWattageSumForEntireYear", {"obstacles": obstacles}, _coconut.functools.partial(getDailySunWattageSumForEntireYear, location, Window(0.), TimeInterval(7., 21.), obstacleGrid[::max(1, len(obstacleGrid) // obstacles)][:obstacles] if obstacles > 0 else [], timezone=timezone), 1))
+    for windows in ([1, 2] if quick else [1, 2, 4, 8]):
+        benchmarks.append(("getHouseScore", {"windows": windows, "obstacles": 4, "times": 3}, _coconut.functools.partial(getHouseScore, location, allWindows[:windows], obstacleGrid[::30], allTimes[:3], timezone=timezone), 1))
+    if not quick:
+        for obstacles in [4, 16, 64, 120]:
+            benchmarks.append(("getHouseScore", {"windows": 3, "obstacles": obstacles, "times": 3}, _coconut.functools.partial(getHouseScore, location, allWindows[:3], obstacleGrid[::max(1, len(obstacleGrid) // obstacles)][:obstacles], allTimes[:3], timezone=timezone), 1))
+        for times in [1, 2, 4]:
+            benchmarks.append(("getHouseScore", {"windows": 3, "obstacles": 4, "times": times}, _coconut.functools.partial(getHouseScore, location, allWindows[:3], obstacleGrid[::30], allTimes[:times], timezone=timezone), 1))
+        benchmarks.append(("getHouseScore", {"windows": 3, "obstacles": 4, "times": 3, "processes": 2}, _coconut.functools.partial(getHouseScore, location, allWindows[:3], obstacleGrid[::30], allTimes[:3], timezone=timezone, executor=getProcessPool(2)), 1))  # including the transfer of day chunks to worker processes
+        benchmarks.append(("estimateHouseScore", {"windows": 3, "obstacles": 4, "times": 3, "day_step": DAY_STEP}, _coconut.functools.partial(estimateHouseScore, location, allWindows[:3], obstacleGrid[::30], allTimes[:3], timezone=timezone), 1))
+    return benchmarks
+
+
+def runBenchmarks(quick: 'bool'=False, repeat: 'int'=3, log: '_coconut.typing.Optional[Any]'=None) -> 'Dict[str, Any]':
+    ''' Runs all benchmarks.
+      log: optional stream to report progress to
+      returns: JSON-serializable results with machine description
+
+  >>> results = runBenchmarks(quick = True, repeat = 1)
+  >>> sorted(set(result["name"] for result in results["results"]))
+  ['getAngleCorrectedSunWattage', 'getAngleCorrectionRoomFactor', 'getDailySunWattageSumForEntireYear', 'getHouseScore', 'getShadowing', 'getTimeNormalizedSunWattage', 'import']
+  >>> all(result["seconds"] > 0. for result in results["results"])
+  True
+  '''
+    results = []
+    for module in ("numpy", "rese.sunamount"):
+        seconds = measureImport(module, repeat + 2)  # type: float  # more repetitions, as startup times vary a lot
+        results.append({"name": "import", "parameters": {"module": module}, "seconds": seconds})
+        if log is not None:
+            log.write("{:<36} {:<56} {:>12.6g} s\n".format("import", json.dumps({"module": module}), seconds))
+    for name, parameters, func, number in getBenchmarks(quick):
+        func()  # warm up imports, e.g. pysolar's tables
+        seconds = measure(func, repeat, number, clearCaches)  # type: float  # without memoized ephemeris, midnights and day tables
+        results.append({"name": name, "parameters": parameters, "seconds": seconds})
+        if log is not None:
+            log.write("{:<36} {:<56} {:>12.6g} s\n".format(name, json.dumps(parameters, sort_keys=True), seconds))
+    return {"date": datetime.datetime.now().isoformat(), "machine": platform.machine(), "processor": platform.processor(), "python": platform.python_version(), "numpy": numpy.__version__, "results": results}
+
+
+def getKey(result: 'Dict[str, Any]') -> 'str':
+    return result["name"] + json.dumps(result["parameters"], sort_keys=True)
+
+
+def compareResults(previous: 'Dict[str, Any]', current: 'Dict[str, Any]') -> 'List[Tuple[str, float]]':
+    ''' Compares two benchmark results, e.g. of two versions.
+      returns: list of benchmarks present in both, with the ratio of current over previous time (above 1 means slower)
+
+  >>> compareResults({"results": [{"name": "a", "parameters": {}, "seconds": 2.}]}, {"results": [{"name": "a", "parameters": {}, "seconds": 1.}, {"name": "b", "parameters": {}, "seconds": 1.}]})
+  [('a{}', 0.5)]
+  '''
+    before = {getKey(result): result["seconds"] for result in previous["results"]}  # type: Dict[str, float]
+    return [(getKey(result), result["seconds"] / before[getKey(result)]) for result in current["results"] if getKey(result) in before]
+
+
+if __name__ == '__main__':
+    if '--test' in sys.argv:
+        import doctest
+        doctest.testmod()
+        sys.exit(0)
+    results = runBenchmarks(quick='--quick' in sys.argv, log=sys.stdout)
+    output = sys.argv[sys.argv.index('--output') + 1] if '--output' in sys.argv else "benchmark_{}.json".format(datetime.date.today().isoformat())  # type: str
+    with open(output, "w") as fd:
+        json.dump(results, fd, indent=2)
+    (print)("Results written to {}".format(output))
+    if '--compare' in sys.argv:
+        with open(sys.argv[sys.argv.index('--compare') + 1]) as fd:
+            previous = json.load(fd)
+        for key, ratio in compareResults(previous, results):
+            (print)("{:<92} {:6.2f}x{}".format(key, ratio, "  REGRESSION" if ratio > 1.2 else ""))
+    overhead = getImportOverhead(results)  # type: float
+    if overhead > IMPORT_BUDGET:
+        (print)("Importing rese.sunamount takes {:.3f} s on top of numpy, above the budget of {:.3f} s".format(overhead, IMPORT_BUDGET))
+        sys.exit(1)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0xcbcbbb44
+# __coconut_hash__ = 0x49cc982b
 
 # Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
 
@@ -67,6 +67,7 @@ def compareMidsummerMidwinter(coordinates: 'Location') -> 'None':
 if __name__ == '__main__':
     (compareMidsummerMidwinter)(airportNeugrabenFischbek)  # Do a sanity check
 
-    for house, windows in (sorted)(houseChoices.items()):
+    houses = {house: (windows, houseObstacles.get(house, [defaultObstacle])) for house, windows in houseChoices.items()}
+    for house, score in compareHouses(airportNeugrabenFischbek, houses, atHomeTimes, timezone=timezone):  # scored in parallel
         (print)(house)
-        ((print)(("  # Computed annual sum of hourly radiation during observed times: {}".format)(getHouseScore(airportNeugrabenFischbek, windows, houseObstacles.get(house, [defaultObstacle]), atHomeTimes, timezone=timezone))))
+        ((print)(("  # Computed annual sum of hourly radiation during observed times: {}".format)(score)))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# __coconut_hash__ = 0x3f2386ea
+
+# Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
+
+# Coconut Header: -------------------------------------------------------------
+
+import sys as _coconut_sys, os.path as _coconut_os_path
+_coconut_file_path = _coconut_os_path.dirname(_coconut_os_path.abspath(__file__))
+_coconut_cached_module = _coconut_sys.modules.get("__coconut__")
+if _coconut_cached_module is not None and _coconut_os_path.dirname(_coconut_cached_module.__file__) != _coconut_file_path:
+    del _coconut_sys.modules["__coconut__"]
+_coconut_sys.path.insert(0, _coconut_file_path)
+from __coconut__ import _coconut, _coconut_NamedTuple, _coconut_MatchError, _coconut_tail_call, _coconut_tco, _coconut_igetitem, _coconut_base_compose, _coconut_forward_compose, _coconut_back_compose, _coconut_forward_star_compose, _coconut_back_star_compose, _coconut_pipe, _coconut_star_pipe, _coconut_back_pipe, _coconut_back_star_pipe, _coconut_bool_and, _coconut_bool_or, _coconut_none_coalesce, _coconut_minus, _coconut_map, _coconut_partial
+from __coconut__ import *
+_coconut_sys.path.remove(_coconut_file_path)
+
+# Compiled Coconut: -----------------------------------------------------------
+
+# -*- coding: utf-8 -*-
+# Copyright Arne Bachmann
+
+# Post-processes compiled Coconut runtime headers (__coconut__.py) for a faster import, cf. the import budget in benchmark.py
+# Usage: python lean.py rese/__coconut__.py __coconut__.py
+
+
+# Standard modules
+import os  # for the compiled modules next to a header
+import re  # for rewriting the header
+sys = _coconut_sys  # for command line arguments
+
+# Optional type annotations
+try:
+    from typing import List
+    from typing import Set
+except:
+    pass
+
+
+# Constants
+LAZY_MODULES = ["asyncio", "imp", "pickle", "types"]  # type: _coconut.typing.Sequence[str]  # runtime header imports that are slow (asyncio, pickle), deprecated (imp) or unused by compiled code
+
+
+# Functions
+def getUsedModules(sources: '_coconut.typing.Sequence[str]') -> 'Set[str]':
+    return {name for name in LAZY_MODULES if any((re.search(r"\b_coconut\.{}\b".format(name), source) for source in sources))}
+
+
+def getLeanHeader(header: 'str', keep: 'Set[str]'=set()) -> 'str':
+    ''' Removes the eager imports of LAZY_MODULES from a Coconut runtime header; remaining uses within the header import the module on first call instead.
+      keep: modules to import eagerly anyway, e.g. because compiled modules refer to them (cf. getUsedModules)
+      returns: the lean header
+
+  >>> print(getLeanHeader("class _coconut:\\n    import collections, imp, itertools\\n    if _coconut_sys.version_info >= (3, 4):\\n        import asyncio\\n    else:\\n        import trollius as asyncio\\n    import pickle\\nkey = _coconut.pickle.dumps(key, -1)\\n"))
+  class _coconut:
+      import collections, itertools
+  key = __import__("pickle").dumps(key, -1)
+  <BLANKLINE>
+  >>> "import imp" in getLeanHeader("class _coconut:\\n    import imp\\n", keep = {"imp"})
+  True
+  '''
+    lazy = [name for name in LAZY_MODULES if name not in keep]  # type: _coconut.typing.Sequence[str]
+    if "asyncio" in lazy:  # including the Python 2 backport fallback
+        header = re.sub(r"    if _coconut_sys\.version_info >= \(3, 4\):\n        import asyncio\n    else:\n(?:        .*\n)+?(?=    \S)", "", header)  # including the Python 2 backport fallback
+    lines = []  # type: _coconut.typing.Sequence[str]
+    for line in header.split("\n"):
+        match = re.match(r"^    import ([\w, ]+)$", line)  # module imports of the _coconut class
+        if match:
+            names = [name.strip() for name in match.group(1).split(",") if name.strip() not in lazy]  # type: _coconut.typing.Sequence[str]
+            if not names:
+                continue
+            line = "    import " + ", ".join(names)
+        lines.append(line)
+    header = "\n".join(lines)
+    for name in lazy:
+        header = header.replace("_coconut.{}.".format(name), '__import__("{}").'.format(name))
+    return header
+
+
+def leanHeaderFile(path: 'str') -> 'None':
+    ''' Rewrites a header file in place, keeping the imports that compiled modules in the same folder refer to. '''
+    path = os.path.abspath(path)
+    folder = os.path.dirname(path)  # type: str
+    sources = []  # type: _coconut.typing.Sequence[str]
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".py") and os.path.join(folder, name) not in (path, os.path.abspath(__file__)):  # not this tool's own examples
+            with open(os.path.join(folder, name), encoding="utf-8") as fd:
+                sources.append(fd.read())
+    with open(path, encoding="utf-8") as fd:
+        header = fd.read()
+    with open(path, "w", encoding="utf-8") as fd:
+        fd.write(getLeanHeader(header, getUsedModules(sources)))
+
+
+if __name__ == '__main__':
+    if '--test' in sys.argv:
+        import doctest
+        doctest.testmod()
+        sys.exit(0)
+    for path in sys.argv[1:]:
+        leanHeaderFile(path)
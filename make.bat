@@ -7,6 +7,9 @@ if errorlevel 1 (
   set PY=python3
 )
 coconut -t 3.4 example.coco --mypy --python-version 3.4 --python-executable $PY
+coconut -t 3.4 benchmark.coco --mypy --python-version 3.4 --python-executable $PY
+coconut -t 3.4 lean.coco --mypy --python-version 3.4 --python-executable $PY
 coconut -t 3.4 -p rese/ --mypy --python-version 3.4 --python-executable $PY
+%PY% lean.py rese/__coconut__.py __coconut__.py
 echo Running tests (this may take a few minutes)...
 %PY% example.py
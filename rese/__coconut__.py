@@ -12,16 +12,7 @@ import sys as _coconut_sys
 from builtins import chr, filter, hex, input, int, map, object, oct, open, print, range, str, zip, filter, reversed, enumerate
 py_chr, py_hex, py_input, py_int, py_map, py_object, py_oct, py_open, py_print, py_range, py_str, py_zip, py_filter, py_reversed, py_enumerate = chr, hex, input, int, map, object, oct, open, print, range, str, zip, filter, reversed, enumerate
 class _coconut:
-    import collections, copy, functools, imp, itertools, operator, types, weakref
-    if _coconut_sys.version_info >= (3, 4):
-        import asyncio
-    else:
-        try:
-            import trollius as asyncio
-        except ImportError:
-            class you_need_to_install_trollius: pass
-            asyncio = you_need_to_install_trollius()
-    import pickle
+    import collections, copy, functools, itertools, operator, weakref
     OrderedDict = collections.OrderedDict
     if _coconut_sys.version_info < (3, 3):
         abc = collections
@@ -425,7 +416,7 @@ def recursive_iterator(func):
             hash(key)
         except _coconut.Exception:
             try:
-                key = _coconut.pickle.dumps(key, -1)
+                key = __import__("pickle").dumps(key, -1)
             except _coconut.Exception:
                 use_backup = True
         if use_backup:
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# __coconut_hash__ = 0xa672f2f2
+
+# Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
+
+# Coconut Header: -------------------------------------------------------------
+
+import sys as _coconut_sys, os.path as _coconut_os_path
+_coconut_file_path = _coconut_os_path.dirname(_coconut_os_path.abspath(__file__))
+_coconut_cached_module = _coconut_sys.modules.get("__coconut__")
+if _coconut_cached_module is not None and _coconut_os_path.dirname(_coconut_cached_module.__file__) != _coconut_file_path:
+    del _coconut_sys.modules["__coconut__"]
+_coconut_sys.path.insert(0, _coconut_file_path)
+from __coconut__ import _coconut, _coconut_NamedTuple, _coconut_MatchError, _coconut_tail_call, _coconut_tco, _coconut_igetitem, _coconut_base_compose, _coconut_forward_compose, _coconut_back_compose, _coconut_forward_star_compose, _coconut_back_star_compose, _coconut_pipe, _coconut_star_pipe, _coconut_back_pipe, _coconut_back_star_pipe, _coconut_bool_and, _coconut_bool_or, _coconut_none_coalesce, _coconut_minus, _coconut_map, _coconut_partial
+from __coconut__ import *
+_coconut_sys.path.remove(_coconut_file_path)
+
+# Compiled Coconut: -----------------------------------------------------------
+
+# -*- coding: utf-8 -*-
+# Copyright Arne Bachmann
+
+# This module provides the "rese" console command, which scores house definitions streamed from CSV or JSON lines files.
+# Run "rese --help" for usage, or test via coconut-run cli.coco --test
+
+
+# Standard modules
+import argparse  # for command line parsing
+import collections  # for the queue of scoring house definitions
+import concurrent.futures  # for results known without scoring
+import csv  # for CSV input and output
+import json  # for JSON lines input and output
+sys = _coconut_sys  # for standard input and output
+
+# Dependencies (install via "pip install pytz")
+import pytz
+
+# Custom module
+from rese.sunamount import Location
+from rese.sunamount import Room
+from rese.sunamount import Window
+from rese.sunamount import Obstacle
+from rese.sunamount import TimeInterval
+from rese.sunamount import UTC
+from rese.sunamount import DAY_STEP
+from rese.sunamount import ResultStore
+from rese.sunamount import mktz
+from rese.sunamount import getHouseScore
+from rese.sunamount import getProcessPool
+
+# Optional type annotations
+try:
+    from typing import Any
+    from typing import Dict
+    from typing import Iterator
+    from typing import List
+    from typing import TextIO
+    from typing import Tuple
+except:
+    pass
+
+
+# Constants
+QUEUE_SIZE = 64  # type: int  # maximum number of house definitions being scored at a time; reading the input waits for the oldest result
+CSV_FIELDS = ["name", "latitude", "longitude", "elevation", "timezone", "windows", "obstacles", "times"]  # type: _coconut.typing.Sequence[str]  # columns with lists contain JSON
+
+
+# Functions
+def parseValue(dataType: 'type', value: 'Any') -> 'Any':
+    ''' Creates a value type from a JSON object (keyword arguments) or array (positional arguments).
+      returns: an instance of dataType
+
+  >>> parseValue(Obstacle, [10, 20, 5, 4])
+  Obstacle(direction=10, distance=20, width=5, height=4, opacity=1.0)
+  >>> parseValue(TimeInterval, {"fromHour": 7, "toHour": 9})
+  TimeInterval(fromHour=7, toHour=9, weekFactor=1.0)
+  '''
+    return dataType(**value) if isinstance(value, dict) else dataType(*value)
+
+
+def parseRoom(value: 'Any') -> 'Room':
+    ''' Creates a room, including its optional time intervals, from JSON. '''
+    room = parseValue(Room, value)  # type: Room
+    return room._replace(times=[parseValue(TimeInterval, times) for times in room.times]) if room.times is not None else room
+
+
+def parseWindow(value: 'Any') -> 'Window':
+    ''' Creates a window, including its optional room, from JSON.
+
+  >>> parseWindow({"direction": -45, "room": {"relevance": .5, "times": [[10, 15]]}, "stretch": 2})
+  Window(direction=-45, room=Room(elevation=0.0, relevance=0.5, times=[TimeInterval(fromHour=10, toHour=15, weekFactor=1.0)]), stretch=2)
+  '''
+    window = parseValue(Window, value)  # type: Window
+    return window._replace(room=parseRoom(window.room)) if not isinstance(window.room, Room) else window
+
+
+@_coconut_tco
+def parseTimezone(value: 'Any') -> 'Any':
+    ''' Returns a pytz timezone for a name, or a fixed timezone for an hours offset from UTC.
+
+  >>> parseTimezone("Europe/Berlin"), parseTimezone(2) == mktz(2.), parseTimezone(None) == UTC
+  (<DstTzInfo 'Europe/Berlin' LMT+0:53:00 STD>, True, True)
+  '''
+    if value is None or value == "":
+        return UTC
+    if isinstance(value, str):
+        try:  # e.g. a CSV cell
+            return mktz(float(value))  # e.g. a CSV cell
+        except ValueError:
+            return _coconut_tail_call(pytz.timezone, value)
+    return _coconut_tail_call(mktz, float(value))
+
+
+def parseHouse(record: 'Dict[str, Any]') -> 'Tuple[Location, List[Window], List[Obstacle], List[TimeInterval], Any]':
+    ''' Creates the arguments of getHouseScore from a house definition.
+      The location is either given as "location" (object or array), or as separate "latitude", "longitude" and "elevation" fields.
+      Time intervals are given for the house as "times", or for its rooms; a house without any would score zero like one without sun, and raises a ValueError instead.
+      returns: location, windows, obstacles, time intervals and timezone
+
+  >>> parseHouse({"latitude": 53.5, "longitude": 9.8, "windows": [{"direction": 0, "room": {"times": [[7, 9]]}}]})[3]
+  []
+  >>> parseHouse({"latitude": 53.5, "longitude": 9.8, "windows": [[0]]})
+  Traceback (most recent call last):
+  ...
+  ValueError: no time intervals, neither for the house nor for its rooms
+  '''
+    location = parseValue(Location, record["location"]) if "location" in record else Location(float(record["latitude"]), float(record["longitude"]), float(record.get("elevation") or 0.))  # type: Location
+    windows = [parseWindow(window) for window in record.get("windows", [])]  # type: _coconut.typing.Sequence[Window]
+    times = [parseValue(TimeInterval, times) for times in record.get("times", [])]  # type: _coconut.typing.Sequence[TimeInterval]
+    if not times and not any((window.room.times for window in windows)):
+        raise ValueError("no time intervals, neither for the house nor for its rooms")
+    return (location, windows, [parseValue(Obstacle, obstacle) for obstacle in record.get("obstacles", [])], times, parseTimezone(record.get("timezone")))
+
+
+def getParseError(line: 'int', error: 'Exception') -> 'Dict[str, Any]':  # a result for input that isn't a house definition
+    return {"name": None, "line": line, "error": "line {}: {}: {}".format(line, type(error).__name__, error)}  # a result for input that isn't a house definition
+
+
+def readRecords(stream: 'TextIO', format: 'str'="jsonl") -> 'Iterator[Dict[str, Any]]':
+    ''' Reads house definitions one by one from JSON lines (one object per line) or CSV (cf. CSV_FIELDS).
+      Lines or rows with invalid JSON are reported as results with an "error" and their "line" number (cf. getParseError), without stopping the stream.
+      returns: iterator of house definitions with parsed JSON values, or of parse errors
+
+  >>> import io
+  >>> list(readRecords(io.StringIO('name,latitude,longitude,windows\\nA,53.5,9.8,"[[0]]"\\nB,53.5,9.8,"[[0]"\\n'), "csv"))
+  [{'name': 'A', 'latitude': '53.5', 'longitude': '9.8', 'windows': [[0]]}, {'name': None, 'line': 3, 'error': "line 3: JSONDecodeError: Expecting ',' delimiter: line 1 column 5 (char 4)"}]
+  '''
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            try:
+                yield {key: json.loads(value) if key in ("windows", "obstacles", "times") and value else value for key, value in row.items() if value is not None and value != ""}
+            except ValueError as E:
+                yield getParseError(reader.line_num, E)
+    else:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as E:
+                yield getParseError(number, E)
+                continue
+            yield record if isinstance(record, dict) else getParseError(number, ValueError("house definition must be a JSON object"))
+
+
+def scoreRecord(record: 'Dict[str, Any]', day_step: '_coconut.typing.Optional[int]'=None, cache: '_coconut.typing.Optional[ResultStore]'=None, store: '_coconut.typing.Optional[str]'=None) -> 'Dict[str, Any]':
+    ''' Scores one house definition, reporting errors instead of raising them.
+      cache: optional persistent result store (cf. getHouseScore)
+      store: optional directory of precomputed ephemeris files (cf. getEphemeris)
+      returns: a result with the house's "name" and either its "score" or an "error" message
+  '''
+    try:
+        location, windows, obstacles, times, timezone = parseHouse(record)
+        return {"name": record.get("name"), "score": getHouseScore(location, windows, obstacles, times, timezone=timezone, store=store, day_step=day_step, cache=cache)}
+    except Exception as E:
+        return {"name": record.get("name"), "error": "{}: {}".format(type(E).__name__, E)}
+
+
+def scoreHouses(records: 'Iterator[Dict[str, Any]]', processes: '_coconut.typing.Optional[int]'=None, queue_size: 'int'=QUEUE_SIZE, day_step: '_coconut.typing.Optional[int]'=None, cache: '_coconut.typing.Optional[ResultStore]'=None) -> 'Iterator[Dict[str, Any]]':
+    ''' Scores house definitions on a pool of worker processes and yields the results in input order.
+      At most queue_size house definitions are read ahead, so memory doesn't grow with the input size.
+      processes: number of worker processes (defaults to the number of CPUs), or 0 to score in this process
+      returns: iterator of results (cf. scoreRecord), passing parse errors through (cf. readRecords)
+
+  >>> records = [{"name": "A", "location": [53.4613331, 9.8276266, 20.], "windows": [[45, [0, .5], 2]], "obstacles": [[50, 20, 10, 10, .9]], "times": [[7, 9]], "timezone": "Europe/Berlin"}, {"name": "B"}]
+  >>> for result in scoreHouses(iter(records), processes = 0): print(result)
+  {'name': 'A', 'score': 3585.511887070863}
+  {'name': 'B', 'error': "KeyError: 'latitude'"}
+
+  A malformed line between two valid ones is reported, and the stream continues:
+  >>> import io, json
+  >>> lines = json.dumps(records[0]) + '\\n{"name": "C", "windows": [[0]\\n' + json.dumps(dict(records[0], name = "D")) + '\\n'
+  >>> for result in scoreHouses(readRecords(io.StringIO(lines)), processes = 1): print(result)
+  {'name': 'A', 'score': 3585.511887070863}
+  {'name': None, 'line': 2, 'error': "line 2: JSONDecodeError: Expecting ',' delimiter: line 2 column 1 (char 30)"}
+  {'name': 'D', 'score': 3585.511887070863}
+  '''
+    isParseError = lambda record: "line" in record and "error" in record  # cf. getParseError
+    if processes == 0:
+        for record in records:
+            yield record if isParseError(record) else scoreRecord(record, day_step, cache)
+        return
+    pool = getProcessPool(processes)
+    pending = collections.deque()  # futures in input order
+    for record in records:
+        if len(pending) >= queue_size:  # wait for the oldest result before reading further
+            yield pending.popleft().result()  # wait for the oldest result before reading further
+        if isParseError(record):
+            future = concurrent.futures.Future()  # type: concurrent.futures.Future
+            future.set_result(record)
+            pending.append(future)
+        else:
+            pending.append(pool.submit(scoreRecord, record, day_step, cache))
+    while pending:
+        yield pending.popleft().result()
+
+
+def main(argv: '_coconut.typing.Optional[_coconut.typing.Sequence[str]]'=None) -> 'int':
+    ''' Entry point of the "rese" console command.
+      returns: exit code, 1 if any house definition couldn't be scored
+  '''
+    parser = argparse.ArgumentParser(prog="rese", description="Scores house definitions read from a CSV or JSON lines file, writing one result per line.")
+    parser.add_argument("input", nargs="?", default="-", help="house definitions file, or - for standard input (default)")
+    parser.add_argument("output", nargs="?", default="-", help="results file, or - for standard output (default)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="input and output format (default: derived from the input file name, else jsonl)")
+    parser.add_argument("--processes", type=int, help="number of worker processes (default: number of CPUs, 0: no workers)")
+    parser.add_argument("--queue", type=int, default=QUEUE_SIZE, help="maximum number of houses scored at a time (default: %(default)s)")
+    parser.add_argument("--estimate", nargs="?", type=int, const=DAY_STEP, metavar="DAYS", help="estimate scores from every DAYS-th day (default: %(const)s)")
+    parser.add_argument("--cache", metavar="DIRECTORY", help="reuse scores stored in this directory by earlier runs, and store new ones")
+    args = parser.parse_args(argv)
+    format = (lambda _coconut_none_coalesce_item: ("csv" if args.input.lower().endswith(".csv") else "jsonl") if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(args.format)  # type: str
+    failed = False  # type: bool
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")  # type: TextIO
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")  # type: TextIO
+    try:
+        writer = csv.DictWriter(target, ["name", "score", "error"], extrasaction="ignore") if format == "csv" else None  # parse errors tell their line number in the message
+        if writer is not None:
+            writer.writeheader()
+        for result in scoreHouses(readRecords(source, format), args.processes, max(1, args.queue), args.estimate, ResultStore(args.cache) if args.cache is not None else None):
+            failed = failed or "error" in result
+            if writer is not None:
+                writer.writerow(result)
+            else:
+                target.write(json.dumps(result) + "\n")
+            target.flush()  # stream results as they become available
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if '--test' in sys.argv:
+        import doctest
+        doctest.testmod()
+    else:
+        sys.exit(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# __coconut_hash__ = 0xb3f8d870
+
+# Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
+
+# Coconut Header: -------------------------------------------------------------
+
+import sys as _coconut_sys, os.path as _coconut_os_path
+_coconut_file_path = _coconut_os_path.dirname(_coconut_os_path.abspath(__file__))
+_coconut_cached_module = _coconut_sys.modules.get("__coconut__")
+if _coconut_cached_module is not None and _coconut_os_path.dirname(_coconut_cached_module.__file__) != _coconut_file_path:
+    del _coconut_sys.modules["__coconut__"]
+_coconut_sys.path.insert(0, _coconut_file_path)
+from __coconut__ import _coconut, _coconut_NamedTuple, _coconut_MatchError, _coconut_tail_call, _coconut_tco, _coconut_igetitem, _coconut_base_compose, _coconut_forward_compose, _coconut_back_compose, _coconut_forward_star_compose, _coconut_back_star_compose, _coconut_pipe, _coconut_star_pipe, _coconut_back_pipe, _coconut_back_star_pipe, _coconut_bool_and, _coconut_bool_or, _coconut_none_coalesce, _coconut_minus, _coconut_map, _coconut_partial
+from __coconut__ import *
+_coconut_sys.path.remove(_coconut_file_path)
+
+# Compiled Coconut: -----------------------------------------------------------
+
+# -*- coding: utf-8 -*-
+# Copyright Arne Bachmann
+
+# This module provides a local asyncio scoring server with a JSON lines protocol, and an asynchronous client for it.
+# Many clients share one process with warm ephemeris and result caches. Run "rese-server --help" for usage, or test via coconut-run server.coco --test
+# Uses asyncio protocols and futures instead of async/await syntax, to support the same Python versions as the rest of the package.
+
+
+# Standard modules
+import argparse  # for command line parsing
+if _coconut_sys.version_info < (3, 4):  # for the event loop
+    import trollius as asyncio  # for the event loop
+else:  # for the event loop
+    import asyncio  # for the event loop
+import collections  # for the result cache
+import concurrent.futures  # for the thread pool in tests
+import json  # for the protocol
+import os  # for the ephemeris store
+import re  # for the request id of malformed lines
+sys = _coconut_sys  # for command line arguments
+
+# Custom modules
+from rese.cli import parseHouse
+from rese.cli import scoreRecord
+from rese.sunamount import DAY_STEP
+from rese.sunamount import EPHEMERIS_STORE
+from rese.sunamount import Location
+from rese.sunamount import ResultStore
+from rese.sunamount import getCacheKey
+from rese.sunamount import getEphemerisFilename
+from rese.sunamount import getProcessPool
+from rese.sunamount import getTemporaryStore
+from rese.sunamount import precomputeEphemeris
+
+# Optional type annotations
+try:
+    from typing import Any
+    from typing import Dict
+    from typing import List
+    from typing import Optional
+    from typing import Tuple
+except:
+    pass
+
+
+# Constants
+HOST = "127.0.0.1"  # type: str  # local connections only
+PORT = 8766  # type: int
+BATCH_DELAY = .01  # type: float  # seconds to wait for more requests of the same location before scoring them in one batch
+RESULT_CACHE_SIZE = 4096  # type: int  # maximum number of scores kept by the server
+
+
+# Functions
+def getLineId(line: 'bytes') -> 'Any':
+    ''' Finds the "id" of a request line that isn't a valid house definition, to address the error response.
+      returns: the id, or None if there is none
+
+  >>> getLineId(b'{"id": 7, "name": }'), getLineId(b'{"id": "a\\\\"b", "x"'), getLineId(b'[1]')
+  (7, 'a"b', None)
+  '''
+    match = re.search(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")', line.decode("utf-8", "replace"))
+    try:
+        return json.loads(match.group(1)) if match else None
+    except ValueError:
+        return None
+
+
+@_coconut_tco  # equal for equal house definitions
+def getRequestKey(record: 'Dict[str, Any]') -> 'str':  # equal for equal house definitions
+    return _coconut_tail_call(json.dumps, {key: value for key, value in record.items() if key not in ("id", "name")}, sort_keys=True)  # equal for equal house definitions
+
+
+def getLocationKey(record: 'Dict[str, Any]') -> 'Any':
+    ''' returns: hashable key of a house definition's location and timezone, or None if it can't be parsed (scored alone to report the error) '''
+    try:
+        location, _, _, _, timezone = parseHouse(record)
+        return getCacheKey((location, str(timezone)))
+    except Exception:
+        return None
+
+
+def scoreBatch(records: 'List[Dict[str, Any]]', day_step: '_coconut.typing.Optional[int]'=None, cache: '_coconut.typing.Optional[ResultStore]'=None, store: '_coconut.typing.Optional[str]'=None) -> 'List[Dict[str, Any]]':
+    ''' Scores the requests of one location in one work item, so that the location's sun path is looked up once.
+      store: ephemeris store directory shared by all workers; the first batch of a location precomputes its ephemeris there, later ones on any worker memory-map it
+      returns: results in the order of the records (cf. scoreRecord)
+  '''
+    if store is not None:
+        try:
+            location = parseHouse(records[0])[0]  # type: _coconut.typing.Optional[Location]
+        except Exception:  # reported by scoreRecord
+            location = None  # reported by scoreRecord
+        if location is not None and not os.path.exists(os.path.join(store, getEphemerisFilename(location))):
+            precomputeEphemeris(location, store)
+    return [scoreRecord(record, day_step, cache, store) for record in records]
+
+
+class ScoringServer:
+    ''' Scores house definitions received over local sockets on an executor, without blocking the event loop.
+      Requests for the same location arriving within BATCH_DELAY are scored in one batch, identical requests in flight are computed once, and scores are cached.
+      The protocol is JSON lines: each request is a house definition as read by the rese command (cf. parseHouse), with an optional "id";
+      each response is a result as written by the rese command (cf. scoreRecord), with the request's "id". Responses may arrive out of order.
+      Ephemerides are kept warm for all workers in a shared store directory, each computed once per location (cf. scoreBatch).
+      executor: pool to score on (defaults to the persistent process pool, cf. getProcessPool)
+      store: ephemeris store directory (defaults to EPHEMERIS_STORE, or a temporary directory)
+      cache: optional persistent result store, e.g. shared with other servers and earlier sessions (cf. getHouseScore)
+
+  >>> loop = asyncio.new_event_loop()
+  >>> server = ScoringServer(concurrent.futures.ThreadPoolExecutor(2), day_step = 10)
+  >>> listener = loop.run_until_complete(server.start(port = 0, loop = loop))  # any free port
+  >>> client = loop.run_until_complete(openClient(port = listener.sockets[0].getsockname()[1], loop = loop))
+  >>> house = {"location": [53.4613331, 9.8276266, 20.], "windows": [[45, [0, .5], 2]], "obstacles": [[50, 20, 10, 10, .9]], "times": [[7, 9]], "timezone": "Europe/Berlin"}
+  >>> results = loop.run_until_complete(asyncio.gather(client.score(dict(house, name = "A")), client.score(dict(house, name = "B")), client.score(dict(house, name = "C", windows = [[0]])), client.score({"name": "D"})))
+  >>> for result in results: print(result["name"], round(result["score"], 4) if "score" in result else result["error"])
+  A 3581.9032
+  B 3581.9032
+  C 15679.4241
+  D KeyError: 'latitude'
+  >>> server.computed, server.batches  # A and B are computed once, all houses of the same location in one batch
+  (3, 2)
+  >>> print(loop.run_until_complete(client.score(dict(house, name = "E")))["score"] == results[0]["score"], server.computed)  # cached
+  True 3
+  >>> os.listdir(getTemporaryStore())  # the location's ephemeris, shared by all workers
+  ['ephemeris_v1_53.4613331_9.8276266_20.0_2015_5_-2.0_600.0.npy']
+  >>> broken = client.pending[99] = asyncio.Future(loop = loop); client.transport.write(b'{"id": 99, "name": "G",}\\n')  # malformed lines are answered by id
+  >>> print(loop.run_until_complete(broken)["error"])
+  ValueError: Expecting property name enclosed in double quotes: line 1 column 24 (char 23)
+  >>> broken = client.pending[100] = asyncio.Future(loop = loop); client.transport.write(b'[100]\\n')  # or to the oldest request without an id
+  >>> print(loop.run_until_complete(broken)["error"], client.pending)
+  ValueError: house definition must be a JSON object {}
+  >>> server.inflight["F"], cancelled = asyncio.Future(loop = loop), asyncio.Future(loop = loop)
+  >>> _ = cancelled.cancel(); server.finish(("F",), cancelled); print(server.inflight, results[0]["name"])
+  {} A
+  >>> client.close(); listener.close(); loop.run_until_complete(listener.wait_closed()); loop.close()
+  '''
+    def __init__(_, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None, day_step: '_coconut.typing.Optional[int]'=None, batch_delay: 'float'=BATCH_DELAY, cache_size: 'int'=RESULT_CACHE_SIZE, cache: '_coconut.typing.Optional[ResultStore]'=None, store: '_coconut.typing.Optional[str]'=None) -> 'None':
+        _.executor, _.day_step, _.batch_delay, _.cache_size, _.cache, _.store = executor, day_step, batch_delay, cache_size, cache, store
+        _.results = collections.OrderedDict()  # type: collections.OrderedDict  # request key -> result, least recently used first
+        _.inflight = {}  # type: Dict[str, asyncio.Future]  # request key -> future of the result being computed
+        _.waiting = {}  # type: Dict[Any, List[Tuple[str, Dict[str, Any]]]]  # location key -> requests waiting for the next batch
+        _.loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        _.computed = _.batches = 0
+    def start(_, host: 'str'=HOST, port: 'int'=PORT, path: '_coconut.typing.Optional[str]'=None, loop: '_coconut.typing.Optional[asyncio.AbstractEventLoop]'=None) -> 'Any':
+        ''' returns: a coroutine creating the listening server, on a Unix socket if a path is given, otherwise on TCP '''
+        _.loop = (asyncio.get_event_loop() if loop is None else loop)
+        factory = lambda: ScoringProtocol(_)
+        return _.loop.create_unix_server(factory, path) if path is not None else _.loop.create_server(factory, host, port)
+    def submit(_, record: 'Dict[str, Any]') -> 'asyncio.Future':
+        ''' returns: a future of the result for a house definition, with the request's "name" and "id" '''
+        key = getRequestKey(record)  # type: str
+        respond = lambda result: dict(result, name=record.get("name"), id=record.get("id"))
+        response = asyncio.Future(loop=_.loop)
+        if key in _.results:
+            _.results.move_to_end(key)
+            response.set_result(respond(_.results[key]))
+            return response
+        if key not in _.inflight:
+            _.inflight[key] = asyncio.Future(loop=_.loop)
+            group = getLocationKey(record)
+            if group not in _.waiting:
+                _.loop.call_later(_.batch_delay, _.flush, group)
+            _.waiting.setdefault(group, []).append((key, record))
+        _.inflight[key].add_done_callback(lambda future: response.set_result(respond(future.result())))
+        return response
+    def flush(_, group: 'Any') -> 'None':
+        ''' Scores all waiting requests of a location in one work item on the executor. '''
+        keys, records = zip(*_.waiting.pop(group))
+        _.batches += 1
+        _.computed += len(records)
+        scoring = _.loop.run_in_executor((lambda _coconut_none_coalesce_item: getProcessPool() if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(_.executor), scoreBatch, list(records), _.day_step, _.cache, (lambda _coconut_none_coalesce_item: (lambda _coconut_none_coalesce_item: getTemporaryStore() if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(EPHEMERIS_STORE) if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(_.store))
+        scoring.add_done_callback(lambda future: _.finish(keys, future))
+    def finish(_, keys: 'Tuple[str, ...]', future: 'asyncio.Future') -> 'None':
+        error = asyncio.CancelledError("scoring was cancelled") if future.cancelled() else future.exception()  # type: _coconut.typing.Optional[BaseException]  # exception() raises for cancelled futures
+        results = future.result() if error is None else [{"error": "{}: {}".format(type(error).__name__, error)}] * len(keys)  # type: List[Dict[str, Any]]  # e.g. a broken worker process
+        for key, result in zip(keys, results):
+            if "error" not in result:
+                _.results[key] = result
+                if len(_.results) > _.cache_size:
+                    _.results.popitem(last=False)
+            _.inflight.pop(key).set_result(result)
+
+
+class ScoringProtocol(asyncio.Protocol):
+    ''' One client connection of a ScoringServer, reading requests and writing responses as JSON lines. '''
+    def __init__(_, server: 'ScoringServer') -> 'None':
+        _.server, _.transport, _.buffer = server, None, b""
+    def connection_made(_, transport: 'asyncio.BaseTransport') -> 'None':
+        _.transport = transport
+    def connection_lost(_, exc: '_coconut.typing.Optional[Exception]') -> 'None':  # results still being computed are discarded
+        _.transport = None  # results still being computed are discarded
+    def data_received(_, data: 'bytes') -> 'None':
+        *lines, _.buffer = (_.buffer + data).split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError as E:
+                _.send({"error": "ValueError: {}".format(E), "id": getLineId(line)})
+                continue
+            if not isinstance(record, dict):
+                _.send({"error": "ValueError: house definition must be a JSON object", "id": getLineId(line)})
+                continue
+            _.server.submit(record).add_done_callback(lambda future: _.send(future.result()))
+    def send(_, result: 'Dict[str, Any]') -> 'None':
+        if _.transport is not None:
+            _.transport.write((json.dumps(result) + "\n").encode("utf-8"))
+
+
+class ScoringClient(asyncio.Protocol):
+    ''' Asynchronous client of a ScoringServer; many requests may be pending at a time on one connection (cf. openClient). '''
+    def __init__(_, loop: 'asyncio.AbstractEventLoop') -> 'None':
+        _.loop, _.transport, _.buffer = loop, None, b""
+        _.pending = {}  # type: Dict[int, asyncio.Future]  # request id -> future of the response
+        _.requests = 0
+    def connection_made(_, transport: 'asyncio.BaseTransport') -> 'None':
+        _.transport = transport
+    def connection_lost(_, exc: '_coconut.typing.Optional[Exception]') -> 'None':
+        _.transport = None
+        for future in _.pending.values():
+            future.set_exception(ConnectionError("connection to scoring server lost"))
+        _.pending.clear()
+    def data_received(_, data: 'bytes') -> 'None':
+        *lines, _.buffer = (_.buffer + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                result = json.loads(line.decode("utf-8"))  # type: Dict[str, Any]
+                key = result.pop("id", None)
+                if key is None and "error" in result and _.pending:  # a request the server couldn't read an id from, presumably the oldest one
+                    key = next(iter(_.pending))  # a request the server couldn't read an id from, presumably the oldest one
+                future = _.pending.pop(key, None)  # type: _coconut.typing.Optional[asyncio.Future]
+                if future is not None:
+                    future.set_result(result)
+    def score(_, record: 'Dict[str, Any]') -> 'asyncio.Future':
+        ''' Sends a house definition to the server; its "id" is replaced by the client.
+        returns: a future of the result, e.g. to await, with "name" and either "score" or "error"
+    '''
+        future = asyncio.Future(loop=_.loop)
+        if _.transport is None:
+            future.set_exception(ConnectionError("not connected to scoring server"))
+            return future
+        _.requests += 1
+        _.pending[_.requests] = future
+        _.transport.write((json.dumps(dict(record, id=_.requests)) + "\n").encode("utf-8"))
+        return future
+    def close(_) -> 'None':
+        if _.transport is not None:
+            _.transport.close()
+
+
+def openClient(host: 'str'=HOST, port: 'int'=PORT, path: '_coconut.typing.Optional[str]'=None, loop: '_coconut.typing.Optional[asyncio.AbstractEventLoop]'=None) -> 'asyncio.Future':
+    ''' Connects to a scoring server, on a Unix socket if a path is given, otherwise on TCP.
+      returns: a future of the connected ScoringClient
+  '''
+    loop = (asyncio.get_event_loop() if loop is None else loop)
+    factory = lambda: ScoringClient(loop)
+    connecting = asyncio.ensure_future(loop.create_unix_connection(factory, path) if path is not None else loop.create_connection(factory, host, port), loop=loop)
+    client = asyncio.Future(loop=loop)
+    connecting.add_done_callback(lambda future: client.set_exception(future.exception()) if future.exception() is not None else client.set_result(future.result()[1]))
+    return client
+
+
+def main(argv: '_coconut.typing.Optional[_coconut.typing.Sequence[str]]'=None) -> 'int':
+    ''' Entry point of the "rese-server" console command, serving until interrupted.
+      returns: exit code
+  '''
+    parser = argparse.ArgumentParser(prog="rese-server", description="Scores house definitions sent as JSON lines over a local socket, keeping caches warm between requests.")
+    parser.add_argument("--host", default=HOST, help="TCP host to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=PORT, help="TCP port to listen on (default: %(default)s)")
+    parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--processes", type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--estimate", nargs="?", type=int, const=DAY_STEP, metavar="DAYS", help="estimate scores from every DAYS-th day (default: %(const)s)")
+    parser.add_argument("--cache", metavar="DIRECTORY", help="reuse scores stored in this directory by earlier sessions, and store new ones")
+    args = parser.parse_args(argv)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = ScoringServer(getProcessPool(args.processes), args.estimate, cache=ResultStore(args.cache) if args.cache is not None else None)
+    listener = loop.run_until_complete(server.start(args.host, args.port, args.socket, loop))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        loop.run_until_complete(listener.wait_closed())
+        loop.close()
+    return 0
+
+
+if __name__ == '__main__':
+    if '--test' in sys.argv:
+        import doctest
+        doctest.testmod()
+    else:
+        sys.exit(main())
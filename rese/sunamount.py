@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# __coconut_hash__ = 0x65a62ff0
+# __coconut_hash__ = 0xbf93ce56
 
 # Compiled with Coconut version 1.3.1-post_dev28 [Dead Parrot]
 
@@ -27,19 +27,65 @@ _coconut_sys.path.remove(_coconut_file_path)
 
 # Standard modules
 import calendar  # for number of days in a year computation
+import collections  # for the least recently used order of memoized results
+import contextlib  # for the instrumentation context
 import datetime  # for timestamp generation
+import functools  # for the instrumentation and memoize decorators
+import heapq  # for the k best scores when ranking
+import importlib  # for lazily imported modules
+import inspect  # for memoized arguments that don't affect results
 import math  # trigonometry
-import time  # for system locale's daylight savings information
+import os  # for the ephemeris store location
+sys = _coconut_sys  # for memoized result sizes
+import threading  # for instrumentation counters and memoized results shared by thread pools
+import time  # for system locale's daylight savings information (cf. is_dst), and instrumentation timing
 
-# Dependencies (install via "pip install pysolar pytz" - the latter only used for unit tests)
-import pysolar.solar
+# Dependencies (install via "pip install numpy pysolar<0.8 pytz" - the latter only used for unit tests; getSunPath ports pysolar 0.7)
+import numpy
 
 try:
+    from typing import TYPE_CHECKING
     from typing import Any
+    from typing import Callable
+    from typing import Dict
+    from typing import FrozenSet
+    from typing import Iterable
+    from typing import Iterator
     from typing import List
+    from typing import Optional
+    from typing import Tuple
     from typing import Type
-except:
-    pass
+except:  # type: ignore
+    TYPE_CHECKING = False  # type: ignore
+
+
+class LazyModule:
+    ''' Placeholder for a module that is imported on first attribute access, to keep importing this module fast (cf. the import budget in benchmark.py).
+      Once imported, the module's top-level package replaces the placeholder in this module's namespace.
+
+  >>> LazyModule("json").dumps([1])
+  '[1]'
+  '''
+    def __init__(_, name: 'str') -> 'None':
+        _.name = name
+    @_coconut_tco
+    def __getattr__(_, attribute: 'str') -> 'Any':
+        if attribute.startswith("__"):  # e.g. probing by doctest or pickle, which shouldn't import
+            raise AttributeError(attribute)  # e.g. probing by doctest or pickle, which shouldn't import
+        importlib.import_module(_.name)  # including its parent packages
+        package = _.name.split(".")[0]  # type: str
+        if globals().get(package) is _:
+            globals()[package] = sys.modules[package]
+        return _coconut_tail_call(getattr, sys.modules[package], attribute)
+
+pysolar = LazyModule("pysolar.solar")  # only used by the scalar solar position functions and to compute ephemerides, including pysolar.time, pysolar.constants and pysolar.radiation
+if TYPE_CHECKING:  # for the executor annotations, which a placeholder can't provide
+    import concurrent.futures  # for the executor annotations, which a placeholder can't provide
+else:  # only used for parallel house scoring
+    concurrent = LazyModule("concurrent.futures")  # only used for parallel house scoring
+hashlib = LazyModule("hashlib")  # only used by the persistent result store
+json = LazyModule("json")  # only used by the persistent result store
+sqlite3 = LazyModule("sqlite3")  # only used by the persistent result store
 
 
 # Value type definitionss: instantiation and access per keyword or index
@@ -75,6 +121,12 @@ class Obstacle(_coconut_NamedTuple("Obstacle", [("direction", 'float'), ("distan
     def __new__(_cls, direction, distance, width, height, opacity=1.):  # degrees, meters, meters, meters, 0..1 (0=fully translucent, 1=fully opaque)
         return _coconut.tuple.__new__(_cls, (direction, distance, width, height, opacity))  # degrees, meters, meters, meters, 0..1 (0=fully translucent, 1=fully opaque)
 # degrees, meters, meters, meters, 0..1 (0=fully translucent, 1=fully opaque)
+class CompiledObstacle(_coconut_NamedTuple("CompiledObstacle", [("direction", 'float'), ("horizontalAngle", 'float'), ("verticalAngle", 'float'), ("opacity", 'float'), ("elevation", 'float')])):  # degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
+    __slots__ = ()  # degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
+    __ne__ = _coconut.object.__ne__  # degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
+    def __eq__(self, other):  # degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
+# degrees, degrees, degrees, 0..1, meters (window elevation the angles are computed for)
 class TimeInterval(_coconut_NamedTuple("TimeInterval", [("fromHour", 'float'), ("toHour", 'float'), ("weekFactor", 'float')])):  # 0..23.99, 0..23.99, 0..1
     __slots__ = ()  # 0..23.99, 0..23.99, 0..1
     __ne__ = _coconut.object.__ne__  # 0..23.99, 0..23.99, 0..1
@@ -89,23 +141,302 @@ class Radiation(_coconut_NamedTuple("Radiation", [("wattage", 'float'), ("altitu
     def __eq__(self, other):  # watts, meters, degrees
         return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # watts, meters, degrees
 # watts, meters, degrees
+class SunPath(_coconut_NamedTuple("SunPath", [("timestamps", 'numpy.ndarray'), ("wattage", 'numpy.ndarray'), ("altitude", 'numpy.ndarray'), ("azimuth", 'numpy.ndarray')])):  # seconds since epoch, watts, degrees, degrees (arrays of same shape)
+    __slots__ = ()  # seconds since epoch, watts, degrees, degrees (arrays of same shape)
+    __ne__ = _coconut.object.__ne__  # seconds since epoch, watts, degrees, degrees (arrays of same shape)
+    def __eq__(self, other):  # seconds since epoch, watts, degrees, degrees (arrays of same shape)
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # seconds since epoch, watts, degrees, degrees (arrays of same shape)
+# seconds since epoch, watts, degrees, degrees (arrays of same shape)
+class Ephemeris(_coconut_NamedTuple("Ephemeris", [("location", 'Location'), ("start", 'float'), ("step", 'float'), ("path", 'SunPath')])):  # Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+    __slots__ = ()  # Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+    __ne__ = _coconut.object.__ne__  # Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+    def __eq__(self, other):  # Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+# Location, seconds since epoch, seconds, SunPath on a regular UTC time grid
+class ObstacleIndex(_coconut_NamedTuple("ObstacleIndex", [("levels", 'List[Tuple[float, numpy.ndarray, numpy.ndarray, List[Obstacle]]]')])):  # per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+    __slots__ = ()  # per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+    __ne__ = _coconut.object.__ne__  # per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+    def __eq__(self, other):  # per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+# per group of similar horizontal angles: their maximum, sorted directions, horizontal angles and obstacles
+class HorizonMask(_coconut_NamedTuple("HorizonMask", [("start", 'float'), ("resolution", 'float'), ("elevation", 'float'), ("factors", 'numpy.ndarray')])):  # degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+    __slots__ = ()  # degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+    __ne__ = _coconut.object.__ne__  # degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+    def __eq__(self, other):  # degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+# degrees, degrees, meters, shadow factors per window direction (rows from start) and sun altitude (columns from 0 by MASK_ALTITUDE_STEP)
+class CacheInfo(_coconut_NamedTuple("CacheInfo", [("hits", 'int'), ("misses", 'int'), ("evictions", 'int'), ("size", 'int'), ("bytes", 'int')])):  # statistics of a memoized function (bytes are only estimated with a byte limit)
+    __slots__ = ()  # statistics of a memoized function (bytes are only estimated with a byte limit)
+    __ne__ = _coconut.object.__ne__  # statistics of a memoized function (bytes are only estimated with a byte limit)
+    def __eq__(self, other):  # statistics of a memoized function (bytes are only estimated with a byte limit)
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # statistics of a memoized function (bytes are only estimated with a byte limit)
+# statistics of a memoized function (bytes are only estimated with a byte limit)
+class DayTable(_coconut_NamedTuple("DayTable", [("midnights", 'numpy.ndarray'), ("sunrise", 'numpy.ndarray'), ("noon", 'numpy.ndarray'), ("sunset", 'numpy.ndarray')])):  # seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+    __slots__ = ()  # seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+    __ne__ = _coconut.object.__ne__  # seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+    def __eq__(self, other):  # seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+# seconds since epoch of each UTC day's midnight, sunrise, solar noon and sunset
+class HouseBatch(_coconut_NamedTuple("HouseBatch", [("locations", 'numpy.ndarray'), ("windows", 'numpy.ndarray'), ("windowOffsets", 'numpy.ndarray'), ("obstacles", 'numpy.ndarray'), ("obstacleOffsets", 'numpy.ndarray'), ("times", 'numpy.ndarray'), ("timeOffsets", 'numpy.ndarray'), ("roomTimes", 'numpy.ndarray'), ("roomTimeOffsets", 'numpy.ndarray')])):  # columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
+    __slots__ = ()  # columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
+    __ne__ = _coconut.object.__ne__  # columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
+    def __eq__(self, other):  # columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
+        return self.__class__ is other.__class__ and _coconut.tuple.__eq__(self, other)  # columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
+# columns of many houses (cf. getHouseBatch): structured arrays of all houses' elements, and per house (or per window for room times) the offsets of its first and last element
 
 
 # Constants
 REF_YEAR = 2015  # type: int  # last year with leap seconds definition of the pysolar module, to avoid a warning
 MINUTE_STEPS = 5  # type: int  # time interval for accumulated daily sun wattage (increase for faster computation, decrease for more accurate results)
 ENTIRE_DAY = TimeInterval(fromHour=0., toHour=23.99, weekFactor=1.)
+HORIZON = -2.  # type: float  # degrees; conservative sun altitude for sunrise/sunset tables, below refraction and approximation errors
+DAYLIGHT_MARGIN = 600.  # type: float  # seconds added before sunrise and after sunset, when skipping night-time samples
+DAY_CHUNK = 32  # type: int  # number of days per work item when computing in parallel
+LATITUDE_STEP = 1.  # type: float  # degrees between the latitudes whose ephemerides are interpolated for the latitudes in between (cf. getLatitudeEphemeris)
+DAY_STEP = 10  # type: int  # days between representative days, when estimating annual sums
+EU_STANDARD_HOURS = [0., 1., 2.]  # type: _coconut.typing.Sequence[float]  # standard time offsets of WET, CET and EET, which switch to daylight saving time one hour ahead on the same days
+TYPICAL_YEARS = list(range(REF_YEAR - 3, REF_YEAR + 1))  # type: _coconut.typing.Sequence[int]  # one leap year cycle, averaged for a typical year
+MASK_RESOLUTION = .5  # type: float  # degrees of window direction between the rows of a horizon mask
+MASK_ALTITUDE_STEP = .1  # type: float  # degrees of sun altitude between the columns of a horizon mask
+MIN_PANEL = 1.  # type: float  # seconds; the adaptive integrator doesn't subdivide shorter panels (e.g. around shadow edges)
+EPHEMERIS_FORMAT = 1  # type: int  # version of the precomputed ephemeris files' layout and contents (e.g. NaN night-time samples); increase with any change of getEphemeris' results
+EPHEMERIS_STORE = os.environ.get("RESE_EPHEMERIS_STORE")  # type: _coconut.typing.Optional[str]  # directory of precomputed ephemeris files (cf. --precompute), or None to always compute
+MEMOIZE_SIZE = 256  # type: int  # default maximum number of results per memoized function
+RESULT_STORE_FILE = "results.sqlite"  # type: str  # database file name in a ResultStore directory
+RESULT_STORE_BYTES = 1 << 26  # type: int  # default maximum estimated size of a ResultStore
+RESULT_STORE_TIMEOUT = 60.  # type: float  # seconds to wait for other processes writing to a ResultStore
+RESULT_STORE_TOUCH = 600.  # type: float  # seconds; a ResultStore hit records its access time only if the stored one is older, so that most hits only read
+RESULT_ROW_BYTES = 64  # type: int  # estimated bytes per ResultStore entry in addition to its key, which is stored twice (table and index)
+BOUND_ERRORS = 2.  # type: float  # suggested estimated errors (cf. estimateHouseScore) between an estimate and its upper bound when ranking approximately; observed errors stay below a third of the estimated ones
+BOUND_TOLERANCE = 1e-3  # type: float  # minimum distance of an upper bound from its estimate, relative to the estimate
+BATCH_CHUNK = 64  # type: int  # number of houses per work item when scoring a HouseBatch in parallel
+LOCATION_DTYPE = numpy.dtype([("latitude", float), ("longitude", float), ("elevation", float)])  # columns of Location in a HouseBatch
+WINDOW_DTYPE = numpy.dtype([("direction", float), ("stretch", float), ("elevation", float), ("relevance", float), ("ownTimes", bool)])  # columns of Window and its Room in a HouseBatch; ownTimes tells if the room's times replace the house's time intervals
+OBSTACLE_DTYPE = numpy.dtype([(field, float) for field in Obstacle._fields])  # columns of Obstacle in a HouseBatch
+TIME_DTYPE = numpy.dtype([(field, float) for field in TimeInterval._fields])  # columns of TimeInterval in a HouseBatch
 
 
 # Utility decorator
-class memoize(dict):
-    def __init__(_, func: '_coconut.typing.Callable[[], _coconut.typing.Optional[Any]]') -> 'None':
-        _.func = func
-    def __call__(_, *args):
-        return _[args]
-    def __missing__(_, key):
-        result = _[key] = _.func(*key)
-        return result
+def getCacheKey(value: 'Any') -> 'Any':
+    ''' Converts arguments into a hashable key, also for value types (which aren't hashable), lists, dicts and numpy arrays.
+      returns: hashable key that is equal for equal arguments
+
+  >>> getCacheKey(Location(1., 2.)) == getCacheKey(Location(1., 2.)), getCacheKey(Location(1., 2.)) == getCacheKey(Room(1., 2.))
+  (True, False)
+  >>> hash(getCacheKey([Window(0.), {"a": numpy.arange(3)}])) is not None
+  True
+  '''
+    if isinstance(value, numpy.ndarray):
+        return ("ndarray", value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, tuple):  # including value types
+        return (type(value).__name__,) + tuple((getCacheKey(item) for item in value))  # including value types
+    if isinstance(value, list):
+        return ("list",) + tuple((getCacheKey(item) for item in value))
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted(((key, getCacheKey(item)) for key, item in value.items())))
+    hash(value)  # raises TypeError for other unhashable arguments
+    return value
+
+
+@_coconut_tco
+def getCacheSize(value: 'Any') -> 'int':
+    ''' Estimates the memory size of a result, counting the data of numpy arrays.
+      returns: bytes
+  '''
+    if isinstance(value, numpy.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum((getCacheSize(item) for item in value))
+    return _coconut_tail_call(sys.getsizeof, value)
+
+
+class memoize:
+    ''' Thread-safe memoizing decorator with least recently used eviction, used as @memoize or @memoize(maxsize = ..., maxbytes = ..., ignore = ...).
+      Each result is computed only once, also if several threads request it at the same time.
+      maxsize: maximum number of results, or None for unbounded (e.g. for resources that must not be dropped)
+      maxbytes: maximum estimated bytes of all results (cf. getCacheSize), or None for unbounded
+      ignore: names of arguments that don't affect the result (e.g. an executor), neither part of the key nor kept alive by it
+
+  >>> @memoize(maxsize = 2)
+  ... def square(value): return value * value
+  >>> [square(value) for value in (1, 2, 1, 3, 2)], square.info()
+  ([1, 4, 1, 9, 4], CacheInfo(hits=1, misses=4, evictions=2, size=2, bytes=0))
+  >>> @memoize(maxbytes = 1000)
+  ... def zeros(size): return numpy.zeros(size)
+  >>> _ = [zeros(50), zeros(50), zeros(100)]; zeros.info()  # 400 + 800 bytes
+  CacheInfo(hits=1, misses=2, evictions=1, size=1, bytes=800)
+  >>> with concurrent.futures.ThreadPoolExecutor(4) as executor: results = list(executor.map(zeros, [10] * 20))
+  >>> zeros.info().misses, all(result is results[0] for result in results)
+  (3, True)
+  >>> @memoize(ignore = ("log",))
+  ... def double(value, log = None): return value * 2
+  >>> [double(1), double(1, []), double(value = 1, log = [])], double.info().misses
+  ([2, 2, 2], 1)
+  >>> memoize.clearAll(); double.info().size, getProcessPool in memoize.registry
+  (0, True)
+  '''
+    registry = []  # type: List[memoize]  # all memoized functions, cf. clearAll
+    def __init__(_, func: '_coconut.typing.Optional[Callable]'=None, maxsize: '_coconut.typing.Optional[int]'=MEMOIZE_SIZE, maxbytes: '_coconut.typing.Optional[int]'=None, ignore: 'Tuple[str, ...]'=()) -> 'None':
+        _.func, _.maxsize, _.maxbytes, _.ignore = func, maxsize, maxbytes, ignore
+        _.signature = inspect.signature(func) if func is not None and ignore else None  # for binding positional and keyword arguments alike
+        _.cache = collections.OrderedDict()  # type: collections.OrderedDict
+        _.pending = {}  # type: Dict[Any, threading.Lock]
+        _.lock = threading.Lock()
+        _.hits = _.misses = _.evictions = _.bytes = 0
+        if func is not None:
+            functools.update_wrapper(_, func)
+            memoize.registry.append(_)
+    @_coconut_tco
+    def __call__(_, *args, **kwargs):
+        if _.func is None:  # decorator with arguments
+            return _coconut_tail_call(memoize, args[0], _.maxsize, _.maxbytes, _.ignore)  # decorator with arguments
+        key = getCacheKey(_.getArguments(args, kwargs))
+        with _.lock:
+            if key in _.cache:
+                return _.hit(key)
+            computing = _.pending.setdefault(key, threading.Lock())  # one lock per key being computed
+        with computing:
+            with _.lock:
+                if key in _.cache:  # computed by another thread meanwhile
+                    return _.hit(key)  # computed by another thread meanwhile
+            countEvent("cacheMisses")
+            try:
+                result = _.func(*args, **kwargs)
+            except:
+                with _.lock:
+                    _.pending.pop(key, None)
+                raise
+            with _.lock:
+                _.store(key, result)
+                _.pending.pop(key, None)  # together with storing, so other threads either wait for this computation or find its result
+            return result
+    def getArguments(_, args: 'tuple', kwargs: 'Dict[str, Any]') -> 'Any':
+        if _.signature is None:
+            return (args, kwargs)
+        bound = _.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return {name: value for name, value in bound.arguments.items() if name not in _.ignore}
+    def hit(_, key: 'Any') -> 'Any':
+        _.hits += 1
+        countEvent("cacheHits")
+        _.cache.move_to_end(key)
+        return _.cache[key][0]
+    def store(_, key: 'Any', result: 'Any') -> 'None':
+        size = getCacheSize(result) if _.maxbytes is not None else 0  # type: int
+        _.misses += 1
+        if _.maxbytes is not None and size > _.maxbytes:  # too large to keep
+            return  # too large to keep
+        _.cache[key] = (result, size)
+        _.bytes += size
+        while (_.maxsize is not None and len(_.cache) > _.maxsize) or (_.maxbytes is not None and _.bytes > _.maxbytes):
+            _.bytes -= _.cache.popitem(last=False)[1][1]
+            _.evictions += 1
+    def info(_) -> 'CacheInfo':
+        with _.lock:
+            return CacheInfo(_.hits, _.misses, _.evictions, len(_.cache), _.bytes)
+    def clear(_) -> 'None':
+        with _.lock:
+            _.cache.clear()
+            _.bytes = 0
+    @staticmethod
+    def clearAll() -> 'None':
+        ''' Drops the results of all memoized functions, except for unbounded ones holding resources (e.g. running process pools). '''
+        for func in memoize.registry:
+            if func.maxsize is not None:
+                func.clear()
+    def __reduce__(_) -> 'str':  # pickled by name, e.g. for process pools
+        return _.__qualname__  # pickled by name, e.g. for process pools
+
+
+# Instrumentation
+class Statistics:
+    ''' Call counts and cumulative seconds per stage, and event counters, collected inside an instrument() context.
+      Stages may be nested, e.g. "radiation" is part of "sunPath".
+  '''
+    def __init__(_) -> 'None':  # type: Dict[str, int], Dict[str, float], Dict[str, int], Any
+        _.calls, _.seconds, _.counts, _.lock = {}, {}, {}, threading.Lock()  # type: Dict[str, int], Dict[str, float], Dict[str, int], Any
+    def add(_, stage: 'str', seconds: 'float') -> 'None':
+        with _.lock:
+            _.calls[stage] = _.calls.get(stage, 0) + 1
+            _.seconds[stage] = _.seconds.get(stage, 0.) + seconds
+    def count(_, name: 'str', amount: 'int'=1) -> 'None':
+        with _.lock:
+            _.counts[name] = _.counts.get(name, 0) + amount
+    def hitRate(_, name: 'str') -> '_coconut.typing.Optional[float]':
+        ''' returns: ratio of "<name>Hits" over all "<name>Hits" and "<name>Misses" counts, or None if there were none '''
+        hits, misses = _.counts.get(name + "Hits", 0), _.counts.get(name + "Misses", 0)
+        return hits / (hits + misses) if hits + misses > 0 else None
+    @_coconut_tco
+    def report(_) -> 'str':
+        ''' returns: human-readable multi-line summary '''
+        lines = ["{:<16} {:8d} calls {:10.6f} s".format(stage, _.calls[stage], _.seconds[stage]) for stage in sorted(_.seconds, key=_.seconds.get, reverse=True)]  # type: _coconut.typing.Sequence[str]
+        lines.extend(("{:<16} {:8d}".format(name, _.counts[name]) for name in sorted(_.counts)))
+        lines.extend(("{:<16} {:8.1%} hit rate".format(name, _.hitRate(name)) for name in sorted({name[:-4] for name in _.counts if name.endswith("Hits")} | {name[:-6] for name in _.counts if name.endswith("Misses")})))
+        return _coconut_tail_call("\n".join, lines)
+
+
+INSTRUMENTATION = None  # type: _coconut.typing.Optional[Statistics]  # statistics being collected in this process, or None if disabled (cf. instrument)
+
+
+@contextlib.contextmanager
+def instrument() -> 'Iterator[Statistics]':
+    ''' Collects statistics of all scoring calls inside the context in this process (not in worker processes of a process pool).
+      Without this context, instrumentation only costs a check of INSTRUMENTATION per batch computation.
+      returns: context manager yielding a Statistics object
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> getEphemeris.clear(); getMidnights.clear()  # compute everything once
+  >>> with instrument() as statistics:
+  ...   _ = getHouseScore(location, [Window(45., Room(0, .5), 2.), Window(-45., Room(0., .5), .3)], [Obstacle(50, 20, 10, 10, .9)], [TimeInterval(7., 9.)])
+  >>> statistics.calls["houseScore"], statistics.calls["sunPath"], statistics.calls["windowWattages"], statistics.calls["midnights"]  # the second window reuses the midnights
+  (1, 1, 2, 1)
+  >>> 0.4 < statistics.counts["nightSamples"] / statistics.counts["samples"] < .6, statistics.hitRate("ephemeris"), statistics.seconds["radiation"] < statistics.seconds["sunPath"], statistics.counts["cacheHits"] > 0
+  (True, 1.0, True, True)
+  >>> INSTRUMENTATION is None
+  True
+  '''
+    global INSTRUMENTATION
+    previous = INSTRUMENTATION  # type: _coconut.typing.Optional[Statistics]
+    INSTRUMENTATION = Statistics()
+    try:
+        yield INSTRUMENTATION
+    finally:
+        INSTRUMENTATION = previous
+
+
+def timed(stage: 'str') -> 'Callable':
+    ''' Decorator recording calls and cumulative seconds of a function as a stage, if instrumentation is enabled. '''
+    def decorate(func: 'Callable') -> 'Callable':
+        @functools.wraps(func)
+        @_coconut_tco
+        def wrapper(*args, **kwargs):
+            statistics = INSTRUMENTATION  # type: _coconut.typing.Optional[Statistics]
+            if statistics is None:
+                return _coconut_tail_call(func, *args, **kwargs)
+            start = time.perf_counter()  # type: float
+            try:
+                return func(*args, **kwargs)
+            finally:
+                statistics.add(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class timing:
+    ''' Context manager recording a stage inside a function, if instrumentation is enabled. '''
+    def __init__(_, stage: 'str') -> 'None':
+        _.stage = stage
+    def __enter__(_) -> 'None':
+        _.statistics, _.start = INSTRUMENTATION, time.perf_counter() if INSTRUMENTATION is not None else 0.
+    def __exit__(_, *exc_info) -> 'None':
+        if _.statistics is not None:
+            _.statistics.add(_.stage, time.perf_counter() - _.start)
+
+
+def countEvent(name: 'str', amount: 'int'=1) -> 'None':
+    ''' Increments an event counter, if instrumentation is enabled. '''
+    if INSTRUMENTATION is not None:
+        INSTRUMENTATION.count(name, amount)
 
 
 Timezone = datetime.timezone  # type: Type  # typedef
@@ -132,9 +463,47 @@ def is_dst(dt: 'datetime.datetime') -> 'int':  # WARN: uses only the system's lo
 def tz_datetime(tz: 'Timezone') -> 'function':
     return lambda *args, **kwargs: datetime.datetime(*args, **kwargs).replace(tzinfo=tz)
 
+@_coconut_tco  # seconds since epoch, the numeric time used by all batch computations
+def getLocalMidnight(date: 'datetime.datetime') -> 'float':  # seconds since epoch, the numeric time used by all batch computations
+    return _coconut_tail_call(tz_datetime(date.tzinfo)(date.year, date.month, date.day).timestamp)  # seconds since epoch, the numeric time used by all batch computations
+
+
+@_coconut_tco
+def compileObstacle(obstacle: 'Obstacle', elevation: 'float'=0.) -> 'CompiledObstacle':
+    ''' Computes the angles of an obstacle as seen from a window at some elevation, which don't depend on the sun's position.
+      returns: a CompiledObstacle value type, to be used instead of the obstacle for that elevation
+
+  >>> compiled = compileObstacle(Obstacle(91, 10, 2, 5), 2.)
+  >>> print(round(compiled.horizontalAngle, 2), round(compiled.verticalAngle, 2))
+  11.26 16.03
+  >>> getShadowing(2, 90, compiled, 2.) == getShadowing(2, 90, Obstacle(91, 10, 2, 5), 2.)
+  True
+  '''
+    distanceSquared = (sq)(obstacle.distance)
+    height = obstacle.height - min(obstacle.height, elevation)  # type: float  # assure that no negative angle occurs (window higher than obstacle)
+    verticalAngle = (math.degrees)((math.atan)((height / math.sqrt(distanceSquared + sq(height)))))  # angle up upper building edge above ground (arcsin -1..+1 -> -pi/2..+pi/2)
+    assert verticalAngle >= 0. and verticalAngle < 90.  # can't be 90 or more, unless infinitely wide
+    horizontalAngle = (math.degrees)((math.atan)((obstacle.width / math.sqrt(distanceSquared + sq(obstacle.width) / 4.))))  # max. obstacle angle, width / 2 for angle to each side
+    assert horizontalAngle >= 0. and horizontalAngle < 90.
+    return _coconut_tail_call(CompiledObstacle, obstacle.direction, horizontalAngle, verticalAngle, obstacle.opacity, elevation)
+
+
+def compileObstacles(obstacles: 'numpy.ndarray', elevation: 'float'=0.) -> 'Tuple[numpy.ndarray, numpy.ndarray]':
+    ''' Vectorized compileObstacle for the obstacle columns of a HouseBatch (cf. OBSTACLE_DTYPE).
+      returns: arrays of horizontal and vertical angles in degrees, one per obstacle
+
+  >>> horizontalAngles, verticalAngles = compileObstacles(numpy.array([(91, 10, 2, 5, 1.), (-40, 10, 20, 20, .5)], dtype = OBSTACLE_DTYPE), 2.)
+  >>> print(numpy.round(horizontalAngles, 2), numpy.round(verticalAngles, 2), round(compileObstacle(Obstacle(-40, 10, 20, 20, .5), 2.).verticalAngle, 2))
+  [11.26 54.74] [16.03 41.16] 41.16
+  '''
+    distanceSquared = obstacles["distance"] * obstacles["distance"]
+    height = obstacles["height"] - numpy.minimum(obstacles["height"], elevation)  # assure that no negative angle occurs (window higher than obstacle)
+    return numpy.degrees(numpy.arctan(obstacles["width"] / numpy.sqrt(distanceSquared + obstacles["width"] * obstacles["width"] / 4.))), numpy.degrees(numpy.arctan(height / numpy.sqrt(distanceSquared + height * height)))
+
 
 def getShadowing(sunAltitude: 'float', direction: 'float', obstacle: 'Obstacle', elevation: 'float'=0.) -> 'float':
     ''' Returns sunlight ratio of another building shadowing a window
+      obstacle: an Obstacle, or a CompiledObstacle for the same elevation
       returns: 0..1 factor to multiply with incoming sunlight wattage, to reduce its value by the obstacle blocking some light (lower value means less light/more shadowing)
 
   >>> print(round(getShadowing(2, 90, Obstacle(91, 10, 2, 5)), 4))  # hypo: 11.18m, vangle: 24.10°, hypo: 10.05m, hangle: 11.26°
@@ -155,14 +524,9 @@ def getShadowing(sunAltitude: 'float', direction: 'float', obstacle: 'Obstacle',
   0.1219
   '''
     translucency = 1. - obstacle.opacity  # type: float
-    distanceSquared = (sq)(obstacle.distance)
-    elevation = min(obstacle.height, elevation)  # assure that no negative angle occurs (window higher than obstacle)
-    hypothenuse = math.sqrt(distanceSquared + sq(obstacle.height - elevation))
-    verticalAngle = (math.degrees)((math.atan)(((obstacle.height - elevation) / hypothenuse)))  # angle up upper building edge above ground (arcsin -1..+1 -> -pi/2..+pi/2)
-    assert verticalAngle >= 0. and verticalAngle < 90.  # can't be 90 or more, unless infinitely wide
-    hypothenuse = math.sqrt(distanceSquared + sq(obstacle.width) / 4.)  # width / 2 for angle to each side
-    horizontalAngle = (math.degrees)((math.atan)((obstacle.width / hypothenuse)))  # max. obstacle angle
-    assert horizontalAngle >= 0. and horizontalAngle < 90.
+    compiled = obstacle if isinstance(obstacle, CompiledObstacle) else compileObstacle(obstacle, elevation)  # type: CompiledObstacle
+    assert compiled.elevation == elevation
+    horizontalAngle, verticalAngle = compiled.horizontalAngle, compiled.verticalAngle
     horizontal_diff_deg = abs(direction - obstacle.direction)  # angles out of right direction, independent of right or left
     if horizontal_diff_deg >= horizontalAngle or sunAltitude >= verticalAngle:  # is definitely not shadowed (no obstacle in path of sunlight)
         return 1.  # is definitely not shadowed (no obstacle in path of sunlight)
@@ -209,6 +573,7 @@ def getAngleCorrectionRoomFactor(viewingAngle: 'float', incomingAngle: 'float',
     return factor
 
 
+@timed("pysolar")
 @_coconut_tco
 def getAngleCorrectedSunWattage(date: 'datetime.datetime', location: 'Location', window: 'Window') -> 'Radiation':
     ''' Get radiation amount for specific date, location, and viewing direction.
@@ -239,8 +604,541 @@ def getAngleCorrectedSunWattage(date: 'datetime.datetime', location: 'Location',
     return Radiation(factor * pysolar.solar.radiation.get_radiation_direct(date, altitude), altitude, azimuth) if factor > 0. else Radiation(0., 0., 0.)  # compute radiation in Watts / square meter
 
 
-def getTimeNormalizedSunWattage(date: 'datetime.datetime', location: 'Location', window: 'Window', timeInterval: 'TimeInterval'=ENTIRE_DAY, obstacles: '_coconut.typing.Sequence[Obstacle]'=[], minute_interval: 'int'=MINUTE_STEPS) -> 'float':
+@_coconut_tco
+def getSampleMinutes(timeInterval: 'TimeInterval', minute_interval: 'int'=MINUTE_STEPS) -> 'numpy.ndarray':
+    ''' Lists the minutes of a day at which a time interval is sampled, using the same hour-wise stepping as the original per-minute loop.
+      returns: array of minutes since midnight
+
+  >>> print(getSampleMinutes(TimeInterval(9.5, 11.), 15))
+  [570. 585. 600. 615. 630. 645.]
+  >>> print(len(getSampleMinutes(ENTIRE_DAY)))
+  288
+  '''
+    minutes_from = int((timeInterval.fromHour % 1.) * 60)  # type: int
+    minutes_to = int((timeInterval.toHour % 1.) * 60)  # type: int
+    if minutes_to == 0:  # to avoid computation on last hour (e.g. 4..5 means not compute first minute of 5)
+        minutes_to = -1  # to avoid computation on last hour (e.g. 4..5 means not compute first minute of 5)
+    return _coconut_tail_call(numpy.array, [hour * 60 + minute for hour in range(int(timeInterval.fromHour), int(timeInterval.toHour) + 1) for minute in range(minutes_from if hour == int(timeInterval.fromHour) else 0, minutes_to + 1 if hour == int(timeInterval.toHour) else 60, minute_interval)], dtype=float)
+
+
+def getSeriesSum(jme: 'numpy.ndarray', coeffs: 'List[List[List[float]]]') -> 'numpy.ndarray':
+    ''' Vectorized version of pysolar.solar.get_coeff: evaluates periodic terms per power of the Julian ephemeris millennium.
+      All terms are evaluated in place into preallocated buffers, so the number of temporary arrays doesn't grow with the number of terms.
+      returns: array of series values
+  '''
+    result = numpy.zeros_like(jme)
+    x = numpy.ones_like(jme)
+    c = numpy.empty_like(jme)
+    term = numpy.empty_like(jme)
+    for line in coeffs:
+        c.fill(0.)
+        for l in line:  # c += l[0] * cos(l[1] + l[2] * jme), same summation order as pysolar
+            numpy.multiply(jme, l[2], out=term)
+            term += l[1]
+            numpy.cos(term, out=term)
+            term *= l[0]
+            c += term
+        c *= x
+        result += c
+        x *= jme
+    return result
+
+
+@timed("sunPath")
+@_coconut_tco
+def getSunPath(location: 'Location', timestamps: 'numpy.ndarray', elevation: 'float'=0.) -> 'SunPath':
+    ''' Computes sun altitude, azimuth and direct radiation for an entire array of timestamps in one batch.
+      This is a numpy port of the NREL solar position algorithm as implemented in pysolar.solar.get_altitude, get_azimuth and pysolar.radiation.get_radiation_direct.
+      Results match the scalar pysolar functions within 1e-6 degrees for angles and 1e-4 watts for radiation (only floating point evaluation order differs, amplified for radiation close to the horizon).
+      timestamps: seconds since epoch (UTC), any shape
+      elevation: meters above the location's elevation (e.g. a room's floor level)
+      returns: a SunPath value type with arrays of same shape; wattage is zero below the horizon and azimuth is normalized to -180..180 like in getAngleCorrectedSunWattage
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> dates = [tz_datetime(CET)(REF_YEAR, 1, 1, 12), tz_datetime(CEST)(REF_YEAR, 6, 1, 12), tz_datetime(CEST)(REF_YEAR, 8, 31, 18, 35)]
+  >>> path = getSunPath(location, numpy.array([date.timestamp() for date in dates]))
+  >>> print([(round(float(w), 3), round(float(alt), 3), round(float(az), 3)) for w, alt, az in zip(path.wattage, path.altitude, path.azimuth)])
+  [(677.654, 13.421, 5.699), (857.709, 55.223, 33.055), (492.536, 13.792, -85.891)]
+
+  Compare with the scalar pysolar path over an entire day:
+  >>> dates = [tz_datetime(CEST)(REF_YEAR, 7, 1, hour, minute) for hour in range(24) for minute in range(0, 60, 10)]
+  >>> path = getSunPath(location, numpy.array([date.timestamp() for date in dates]), 3.)
+  >>> altitudes = [pysolar.solar.get_altitude(location.latitude, location.longitude, date, location.elevation + 3.) for date in dates]
+  >>> azimuths = [pysolar.solar.get_azimuth(location.latitude, location.longitude, date, location.elevation + 3.) for date in dates]
+  >>> print(max(abs(a - b) for a, b in zip(path.altitude, altitudes)) < 1e-6, max(abs((a - b + 180.) % 360. - 180.) for a, b in zip(path.azimuth, azimuths)) < 1e-6)
+  True True
+  >>> print(max(abs(w - (pysolar.solar.radiation.get_radiation_direct(date, alt) if alt >= 0. else 0.)) for w, alt, date in zip(path.wattage, altitudes, dates)) < 1e-4)
+  True
+  '''
+    timestamps = numpy.asarray(timestamps, dtype=float)
+    seconds = timestamps.astype(numpy.int64).astype("datetime64[s]")
+    months, monthIndex = numpy.unique(seconds.astype("datetime64[M]"), return_inverse=True)  # leap seconds and delta t are defined per UTC month
+    monthStarts = [datetime.datetime.utcfromtimestamp(int(month.astype("datetime64[s]").astype(numpy.int64))) for month in months]
+    leap = numpy.array([pysolar.time.get_leap_seconds(when) for when in monthStarts])[monthIndex].reshape(timestamps.shape)
+    delta_t = numpy.array([pysolar.time.get_delta_t(when) for when in monthStarts])[monthIndex].reshape(timestamps.shape)
+    day = (seconds.astype("datetime64[D]") - seconds.astype("datetime64[Y]")).astype(numpy.int64) + 1  # UTC day of year
+
+# time-dependent calculations
+    jd = (timestamps + leap + pysolar.time.tt_offset - delta_t) / pysolar.constants.seconds_per_day + pysolar.time.gregorian_day_offset + pysolar.time.julian_day_offset
+    jde = (timestamps + leap + pysolar.time.tt_offset) / pysolar.constants.seconds_per_day + pysolar.time.gregorian_day_offset + pysolar.time.julian_day_offset
+    jce = (jde - 2451545.0) / 36525.0
+    jme = jce / 10.0
+    geocentric_latitude = -1 * numpy.degrees(getSeriesSum(jme, pysolar.constants.heliocentric_latitude_coeffs) / 1e8)
+    geocentric_longitude = (numpy.degrees(getSeriesSum(jme, pysolar.constants.heliocentric_longitude_coeffs) / 1e8) % 360 + 180) % 360
+    sun_earth_distance = getSeriesSum(jme, pysolar.constants.sun_earth_distance_coeffs) / 1e8
+    aberration_correction = -20.4898 / (3600.0 * sun_earth_distance)
+    equatorial_horizontal_parallax = 8.794 / (3600 / sun_earth_distance)
+    polynomials = pysolar.constants.get_aberration_coeffs()
+    x = [polynomials[name](jce) for name in ('MeanElongationOfMoon', 'MeanAnomalyOfSun', 'MeanAnomalyOfMoon', 'ArgumentOfLatitudeOfMoon', 'LongitudeOfAscendingNode')]  # order is important
+    nutation_longitude = numpy.zeros_like(jce)
+    nutation_obliquity = numpy.zeros_like(jce)
+    sigmaxy, term, factor = numpy.empty_like(jce), numpy.empty_like(jce), numpy.empty_like(jce)  # buffers reused for all terms
+    for abcd, y in zip(pysolar.constants.nutation_coefficients, pysolar.constants.aberration_sin_terms):
+        sigmaxy.fill(0.)
+        for j in range(len(x)):
+            numpy.multiply(x[j], y[j], out=term)
+            sigmaxy += term
+        numpy.radians(sigmaxy, out=sigmaxy)
+        numpy.multiply(jce, abcd[1], out=factor)  # nutation_longitude += (abcd[0] + abcd[1] * jce) * sin(radians(sigmaxy))
+        factor += abcd[0]
+        numpy.sin(sigmaxy, out=term)
+        term *= factor
+        nutation_longitude += term
+        numpy.multiply(jce, abcd[3], out=factor)  # nutation_obliquity += (abcd[2] + abcd[3] * jce) * cos(radians(sigmaxy))
+        factor += abcd[2]
+        numpy.cos(sigmaxy, out=term)
+        term *= factor
+        nutation_obliquity += term
+    nutation_longitude /= 36000000.0  # scales from 0.0001 arcseconds to degrees
+    nutation_obliquity /= 36000000.0
+    u = jme / 10.0
+    mean_obliquity = (84381.448 - (4680.93 * u) - (1.55 * u**2) + (1999.25 * u**3) - (51.38 * u**4) - (249.67 * u**5) - (39.05 * u**6) + (7.12 * u**7) + (27.87 * u**8) + (5.79 * u**9) + (2.45 * u**10))
+    true_ecliptic_obliquity = (mean_obliquity / 3600.0) + nutation_obliquity
+    jc = (jd - 2451545.0) / 36525.0
+    mean_sidereal_time = (280.46061837 + (360.98564736629 * (jd - 2451545.0)) + 0.000387933 * jc * jc * (1 - jc / 38710000)) % 360
+    apparent_sidereal_time = mean_sidereal_time + nutation_longitude * numpy.cos(true_ecliptic_obliquity)  # sic: pysolar applies cos to degrees
+
+# calculations dependent on location and time
+    latitude_rad = math.radians(location.latitude)
+    flattened_latitude_rad = (math.radians)((math.degrees)((math.atan)(0.99664719 * math.tan(latitude_rad))))
+    projected_radial_distance = math.cos(flattened_latitude_rad) + ((location.elevation + elevation) * math.cos(latitude_rad) / pysolar.constants.earth_radius)
+    projected_axial_distance = 0.99664719 * math.sin(flattened_latitude_rad) + ((location.elevation + elevation) * math.sin(latitude_rad) / pysolar.constants.earth_radius)
+    apparent_sun_longitude_rad = (numpy.radians)(geocentric_longitude + nutation_longitude + aberration_correction)
+    true_ecliptic_obliquity_rad = (numpy.radians)(true_ecliptic_obliquity)
+    geocentric_latitude_rad = (numpy.radians)(geocentric_latitude)
+    geocentric_sun_right_ascension = numpy.degrees(numpy.arctan2(numpy.sin(apparent_sun_longitude_rad) * numpy.cos(true_ecliptic_obliquity_rad) - numpy.tan(geocentric_latitude_rad) * numpy.sin(true_ecliptic_obliquity_rad), numpy.cos(apparent_sun_longitude_rad))) % 360
+    gsd_rad = numpy.arcsin(numpy.sin(geocentric_latitude_rad) * numpy.cos(true_ecliptic_obliquity_rad) + numpy.cos(geocentric_latitude_rad) * numpy.sin(true_ecliptic_obliquity_rad) * numpy.sin(apparent_sun_longitude_rad))
+    lha_rad = (numpy.radians)((apparent_sidereal_time + location.longitude - geocentric_sun_right_ascension) % 360)
+    ehp_sin = (numpy.sin)((numpy.radians)(equatorial_horizontal_parallax))
+    parallax_sun_right_ascension = numpy.arctan2(-1 * projected_radial_distance * ehp_sin * numpy.sin(lha_rad), numpy.cos(gsd_rad) - projected_radial_distance * ehp_sin * numpy.cos(lha_rad))
+    tlha_rad = lha_rad - parallax_sun_right_ascension
+    tsd_rad = numpy.arctan2((numpy.sin(gsd_rad) - projected_axial_distance * ehp_sin) * numpy.cos(parallax_sun_right_ascension), numpy.cos(gsd_rad) - projected_axial_distance * ehp_sin * numpy.cos(lha_rad))
+    topocentric_elevation_angle = numpy.degrees(numpy.arcsin(math.sin(latitude_rad) * numpy.sin(tsd_rad) + math.cos(latitude_rad) * numpy.cos(tsd_rad) * numpy.cos(tlha_rad)))
+    with numpy.errstate(all="ignore"):  # branches not taken may overflow or divide by zero
+        refraction_correction = numpy.where(topocentric_elevation_angle >= -1.0 * (0.26667 + 0.5667), (pysolar.constants.standard_pressure * 2.830 * 1.02) / (1010.0 * pysolar.constants.standard_temperature * 60.0 * numpy.tan(numpy.radians(topocentric_elevation_angle + (10.3 / (topocentric_elevation_angle + 5.11))))), 0.)
+        altitude = topocentric_elevation_angle + refraction_correction
+        azimuth = 180 - (180.0 + numpy.degrees(numpy.arctan2(numpy.sin(tlha_rad), numpy.cos(tlha_rad) * math.sin(latitude_rad) - numpy.tan(tsd_rad) * math.cos(latitude_rad))) % 360)
+        azimuth = numpy.where(azimuth < -180., azimuth + 360., azimuth)  # normalization to -180..180
+
+        with timing("radiation"):  # direct radiation (from Masters, p. 412), only above the horizon
+            flux = 1160 + (75 * numpy.sin(2 * math.pi / 365 * (day - 275)))
+            optical_depth = 0.174 + (0.035 * numpy.sin(2 * math.pi / 365 * (day - 100)))
+            wattage = numpy.where(altitude >= 0., flux * numpy.exp(-1 * optical_depth / numpy.sin(numpy.radians(altitude))), 0.)
+    return _coconut_tail_call(SunPath, timestamps, wattage, altitude, azimuth)
+
+
+@memoize
+@timed("dayTable")
+@_coconut_tco
+def getDayTable(location: 'Location', year: 'int'=REF_YEAR) -> 'DayTable':
+    ''' Computes approximate sunrise, solar noon and sunset times for all days of a year (plus one day before and after, as in getEphemeris).
+      Uses Spencer's declination and equation of time series with the conservative HORIZON altitude, so that the sun is always below the horizon outside these times.
+      On days without sunrise (polar night) sunrise and sunset equal noon; on days without sunset (polar day) they are twelve hours before and after noon.
+      returns: a DayTable value type
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> table = getDayTable(location)
+  >>> def output(index): print(*[datetime.datetime.fromtimestamp(table[field][index], CET).strftime("%H:%M") for field in (1, 2, 3)])
+  >>> output(1)  # January 1st (earlier sunrise and later sunset than usually published, due to the conservative horizon)
+  08:26 12:23 16:21
+  >>> output(172)  # June 21st
+  03:40 12:22 21:04
+  >>> print(len(table.noon), (getDayTable(Location(-85., 0.)).sunset - getDayTable(Location(-85., 0.)).sunrise)[[1, 172]])
+  367 [86400.     0.]
+  '''
+    days = numpy.arange(-1, daysinyear(year) + 1)
+    midnights = tz_datetime(UTC)(year, 1, 1).timestamp() + 86400. * days
+    gamma = 2. * math.pi / 365. * (days + .5)  # fractional year at noon
+    declination = (0.006918 - 0.399912 * numpy.cos(gamma) + 0.070257 * numpy.sin(gamma) - 0.006758 * numpy.cos(2 * gamma) + 0.000907 * numpy.sin(2 * gamma) - 0.002697 * numpy.cos(3 * gamma) + 0.00148 * numpy.sin(3 * gamma))  # radians
+    equation_of_time = 229.18 * (0.000075 + 0.001868 * numpy.cos(gamma) - 0.032077 * numpy.sin(gamma) - 0.014615 * numpy.cos(2 * gamma) - 0.040849 * numpy.sin(2 * gamma))  # minutes
+    noon = midnights + 60. * (720. - 4. * location.longitude - equation_of_time)
+    latitude = math.radians(location.latitude)
+    cos_hour_angle = (math.sin(math.radians(HORIZON)) - math.sin(latitude) * numpy.sin(declination)) / (math.cos(latitude) * numpy.cos(declination))
+    half_day = 240. * numpy.degrees(numpy.arccos(numpy.clip(cos_hour_angle, -1., 1.)))  # four minutes per degree of hour angle
+    return _coconut_tail_call(DayTable, midnights, noon - half_day, noon, noon + half_day)
+
+
+@_coconut_tco
+def getDaylightSunPath(location: 'Location', timestamps: 'numpy.ndarray', elevation: 'float'=0.) -> 'SunPath':
+    ''' Computes the sun path like getSunPath, but evaluates only samples between sunrise and sunset (cf. getDayTable, plus DAYLIGHT_MARGIN).
+      returns: a SunPath value type; night-time samples have zero wattage and undefined (NaN) angles
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> timestamps = tz_datetime(CET)(REF_YEAR, 1, 1).timestamp() + 300. * numpy.arange(365 * 288)
+  >>> full, daylight = getSunPath(location, timestamps), getDaylightSunPath(location, timestamps)
+  >>> print(numpy.array_equal(full.wattage, daylight.wattage), round(float(numpy.isnan(daylight.altitude).mean()), 3))  # same result, but only evaluated 54% of the samples
+  True 0.461
+  >>> for latitude in (-70., -30., 0., 45., 68., 85.):
+  ...   print(latitude, numpy.array_equal(getSunPath(Location(latitude, -150.), timestamps).wattage, getDaylightSunPath(Location(latitude, -150.), timestamps).wattage))
+  -70.0 True
+  -30.0 True
+  0.0 True
+  45.0 True
+  68.0 True
+  85.0 True
+  '''
+    timestamps = numpy.asarray(timestamps, dtype=float)
+    if timestamps.size == 0:
+        return _coconut_tail_call(getSunPath, location, timestamps, elevation)
+    year = datetime.datetime.fromtimestamp(float(numpy.median(timestamps)), UTC).year  # type: int
+    table = getDayTable(location, year)  # type: DayTable
+    after = numpy.clip(numpy.searchsorted(table.noon, timestamps), 1, len(table.noon) - 1)  # between the solar noons of two consecutive days
+    outside = (timestamps < table.noon[0]) | (timestamps > table.noon[-1])  # not covered by table: always evaluate
+    daylight = outside | (timestamps <= table.sunset[after - 1] + DAYLIGHT_MARGIN) | (timestamps >= table.sunrise[after] - DAYLIGHT_MARGIN)
+    countEvent("samples", timestamps.size)
+    countEvent("nightSamples", timestamps.size - int(daylight.sum()))
+    path = getSunPath(location, timestamps[daylight], elevation)  # type: SunPath
+    wattage, altitude, azimuth = numpy.zeros_like(timestamps), numpy.full_like(timestamps, numpy.nan), numpy.full_like(timestamps, numpy.nan)
+    wattage[daylight], altitude[daylight], azimuth[daylight] = path.wattage, path.altitude, path.azimuth
+    return _coconut_tail_call(SunPath, timestamps, wattage, altitude, azimuth)
+
+
+@_coconut_tco
+def getObstacleIndex(obstacles: '_coconut.typing.Sequence[Obstacle]') -> 'ObstacleIndex':
+    ''' Indexes obstacles by the angular interval of window directions that they can shadow (cf. getShadowing), which is their direction +/- their horizontal angle.
+      Obstacles are grouped by horizontal angles within a factor of two, and sorted by direction per group.
+      returns: an ObstacleIndex value type for getCandidateObstacles
+  '''
+    groups = {}  # type: Dict[int, List[Tuple[float, Obstacle]]]
+    for obstacle in obstacles:
+        horizontalAngle = compileObstacle(obstacle).horizontalAngle
+        groups.setdefault(math.frexp(horizontalAngle)[1], []).append((horizontalAngle, obstacle))
+    levels = []
+    for _, group in sorted(groups.items()):
+        group.sort(key=lambda entry: entry[1].direction)
+        levels.append((max((angle for angle, _ in group)), numpy.array([obstacle.direction for _, obstacle in group], dtype=float), numpy.array([angle for angle, _ in group]), [obstacle for _, obstacle in group]))
+    return _coconut_tail_call(ObstacleIndex, levels)
+
+
+def getCandidateObstacles(index: 'ObstacleIndex', direction: 'float') -> '_coconut.typing.Sequence[Obstacle]':
+    ''' Finds the obstacles that can shadow a window direction, by bisection per group of similar horizontal angles.
+      The cost grows with the number of obstacles near the direction, not with the total number of obstacles.
+      returns: list of obstacles, for which getShadowing isn't always 1
+
+  >>> import random
+  >>> generator = random.Random(42)
+  >>> obstacles = [Obstacle(generator.uniform(-180., 180.), generator.uniform(5., 200.), generator.uniform(2., 30.), generator.uniform(2., 20.)) for _ in range(500)]
+  >>> index = getObstacleIndex(obstacles)
+  >>> all(sorted(getCandidateObstacles(index, direction)) == sorted(obstacle for obstacle in obstacles if getShadowing(0., direction, obstacle) < 1.) for direction in range(-180, 180, 7))
+  True
+  >>> len(getCandidateObstacles(index, 10.)), len(getCandidateObstacles(getObstacleIndex([]), 10.))
+  (41, 0)
+  '''
+    candidates = []  # type: _coconut.typing.Sequence[Obstacle]
+    for reach, directions, horizontalAngles, obstacles in index.levels:
+        first, last = numpy.searchsorted(directions, [direction - reach - 1e-9, direction + reach + 1e-9])  # widened against rounding, checked exactly below
+        candidates.extend((obstacles[i] for i in range(first, last) if abs(direction - obstacles[i].direction) < horizontalAngles[i]))
+    return candidates
+
+
+@_coconut_tco
+def getHorizonMask(obstacles: '_coconut.typing.Sequence[Obstacle]', elevation: 'float'=0., resolution: 'float'=MASK_RESOLUTION) -> 'HorizonMask':
+    ''' Rasterizes the shadowing of all obstacles (cf. getShadowing) for a window elevation into a table of window directions and sun altitudes.
+      Each entry is the minimum shadow factor of all obstacles, so looking up a sample doesn't depend on the number of obstacles (cf. getHorizonShadowing).
+      returns: a HorizonMask value type
+
+  >>> mask = getHorizonMask([Obstacle(91, 10, 2, 5), Obstacle(-40, 10, 20, 20, .5)])
+  >>> mask.factors.shape
+  (396, 901)
+  >>> print(round(float(getHorizonShadowing(mask, 90., numpy.array([2.]))[0]), 4), round(getShadowing(2, 90, Obstacle(91, 10, 2, 5)), 4))
+  0.0074 0.0074
+  '''
+    compiled = [obstacle if isinstance(obstacle, CompiledObstacle) else compileObstacle(obstacle, elevation) for obstacle in obstacles]  # type: _coconut.typing.Sequence[CompiledObstacle]
+    altitudes = MASK_ALTITUDE_STEP * numpy.arange(int(round(90. / MASK_ALTITUDE_STEP)) + 1)
+    if len(compiled) == 0:
+        return _coconut_tail_call(HorizonMask, 0., resolution, elevation, numpy.ones((0, len(altitudes))))
+    start = resolution * math.floor(min((obstacle.direction - obstacle.horizontalAngle for obstacle in compiled)) / resolution)  # type: float  # rows at multiples of the resolution
+    directions = start + resolution * numpy.arange(int(math.ceil((max((obstacle.direction + obstacle.horizontalAngle for obstacle in compiled)) - start) / resolution)) + 1)
+    factors = numpy.ones((len(directions), len(altitudes)))
+    for obstacle in compiled:
+        assert obstacle.elevation == elevation
+        first, last = numpy.searchsorted(directions, [obstacle.direction - obstacle.horizontalAngle, obstacle.direction + obstacle.horizontalAngle])
+        columns = min(len(altitudes), int(obstacle.verticalAngle / MASK_ALTITUDE_STEP) + 1)  # type: int  # no shadow at higher sun altitudes
+        horizontal_diff_deg = abs(directions[first:last] - obstacle.direction)[:, None]
+        with numpy.errstate(all="ignore"):
+            shadowFactor = numpy.where((horizontal_diff_deg >= obstacle.horizontalAngle) | (altitudes[None, :columns] >= obstacle.verticalAngle), 1., 1. - obstacle.opacity + obstacle.opacity * (horizontal_diff_deg / obstacle.horizontalAngle) * (altitudes[None, :columns] / obstacle.verticalAngle))
+        factors[first:last, :columns] = numpy.minimum(factors[first:last, :columns], shadowFactor)
+    return _coconut_tail_call(HorizonMask, start, resolution, elevation, factors)
+
+
+@_coconut_tco
+def getHorizonShadowing(mask: 'HorizonMask', direction: 'float', altitude: 'numpy.ndarray') -> 'numpy.ndarray':
+    ''' Looks up the shadow factors for a window direction (in the nearest row) and sun altitudes (interpolated linearly between columns) in a horizon mask.
+      returns: array of 0..1 factors, same shape as altitude
+  '''
+    row = int(round((direction - mask.start) / mask.resolution))  # type: int
+    if row < 0 or row >= len(mask.factors):  # no obstacle in this direction
+        return _coconut_tail_call(numpy.ones_like, altitude)  # no obstacle in this direction
+    position = numpy.clip(altitude, 0., 90.) / MASK_ALTITUDE_STEP
+    column = numpy.minimum(position.astype(int), mask.factors.shape[1] - 2)
+    fraction = position - column
+    return mask.factors[row, column] * (1. - fraction) + mask.factors[row, column + 1] * fraction
+
+
+@timed("windowWattages")
+def getWindowWattages(path: 'SunPath', window: 'Window', obstacles: '_coconut.typing.Sequence[Obstacle]'=[]) -> 'numpy.ndarray':
+    ''' Vectorized combination of getAngleCorrectionRoomFactor and getShadowing for all samples of a sun path.
+      obstacles: Obstacles, or CompiledObstacles for the window's room elevation (cf. compileObstacle), or a HorizonMask for that elevation
+      returns: array of angle corrected and shadowed wattages, same shape as the path's arrays
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> dates = [tz_datetime(CEST)(REF_YEAR, 6, 1, hour) for hour in (0, 9, 12, 17)]
+  >>> path = getSunPath(location, numpy.array([date.timestamp() for date in dates]))
+  >>> print([round(float(w), 3) for w in getWindowWattages(path, Window(0.))])  # same as getAngleCorrectedSunWattage
+  [0.0, 86.011, 718.889, 199.944]
+  >>> print([round(float(w), 3) for w in getWindowWattages(path, Window(-45.))])
+  [0.0, 0.0, 177.526, 681.974]
+  >>> print([round(float(w), 3) for w in getWindowWattages(path, Window(-45.), [Obstacle(-40, 10, 20, 20, .5)])])  # sun is above the obstacle at noon, but behind it in the afternoon
+  [0.0, 0.0, 177.526, 369.292]
+  '''
+    wattage = getIncidentWattages(path, window.direction, window.stretch)
+    altitude = numpy.where(wattage > 0., path.altitude, 0.)  # same as the zero Radiation of the scalar path
+    with timing("shadowing"):
+        if isinstance(obstacles, HorizonMask):
+            assert obstacles.elevation == window.room.elevation
+            shadowFactor = getHorizonShadowing(obstacles, window.direction, altitude)
+        else:
+            compiled = [obstacle if isinstance(obstacle, CompiledObstacle) else compileObstacle(obstacle, window.room.elevation) for obstacle in obstacles]  # type: _coconut.typing.Sequence[CompiledObstacle]
+            assert all((obstacle.elevation == window.room.elevation for obstacle in compiled))
+            directions, horizontalAngles, verticalAngles, opacities, _ = numpy.array(compiled, dtype=float).reshape(-1, len(CompiledObstacle._fields)).T  # one column per field
+            shadowFactor = getShadowFactors(altitude, window.direction, directions, horizontalAngles, verticalAngles, opacities)
+    return wattage * shadowFactor
+
+
+def getIncidentWattages(path: 'SunPath', direction: 'float', stretch: 'float'=1.) -> 'numpy.ndarray':
+    ''' Vectorized getAngleCorrectionRoomFactor for all samples of a sun path, without shadowing.
+      returns: array of angle corrected wattages, same shape as the path's arrays
+  '''
+    with numpy.errstate(invalid="ignore"):
+        diff_deg = abs(direction - path.azimuth) * stretch
+        return numpy.where((path.altitude >= 0.) & (path.altitude <= 180.) & (diff_deg <= 90.), abs(numpy.cos(numpy.radians(diff_deg))) * path.wattage, 0.)
+
+
+def getShadowFactors(altitude: 'numpy.ndarray', direction: 'float', directions: 'numpy.ndarray', horizontalAngles: 'numpy.ndarray', verticalAngles: 'numpy.ndarray', opacities: 'numpy.ndarray') -> 'numpy.ndarray':
+    ''' Vectorized getShadowing of obstacles given as columns (cf. compileObstacles) for a window direction and several sun altitudes.
+      Obstacles that can't shadow the direction are skipped by one array comparison, so their number hardly matters.
+      returns: array of 0..1 factors, the minimum of all obstacles, same shape as altitude
+
+  >>> compiled = compileObstacle(Obstacle(91, 10, 2, 5), 2.)
+  >>> print(round(float(getShadowFactors(numpy.array([2.]), 90., numpy.array([91.]), numpy.array([compiled.horizontalAngle]), numpy.array([compiled.verticalAngle]), numpy.array([1.]))[0]), 4), round(getShadowing(2, 90, compiled, 2.), 4))
+  0.0111 0.0111
+  '''
+    shadowFactor = numpy.ones_like(altitude)
+    horizontal_diff_deg = abs(direction - directions)
+    for i in numpy.flatnonzero(horizontal_diff_deg < horizontalAngles):  # other obstacles are never in the path of sunlight for this window direction
+        with numpy.errstate(all="ignore"):
+            shadowFactor = numpy.minimum(shadowFactor, numpy.where(altitude >= verticalAngles[i], 1., (1. - opacities[i]) + opacities[i] * (horizontal_diff_deg[i] / horizontalAngles[i]) * (altitude / verticalAngles[i])))
+    return shadowFactor
+
+
+@memoize(maxbytes=1 << 28, ignore=("executor",))  # about 70 annual tables; days are keyed by content
+@timed("ephemeris")  # about 70 annual tables; days are keyed by content
+@_coconut_tco  # about 70 annual tables; days are keyed by content
+def getEphemeris(location: 'Location', year: 'int'=REF_YEAR, minute_interval: 'int'=MINUTE_STEPS, store: '_coconut.typing.Optional[str]'=None, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None, days: '_coconut.typing.Optional[numpy.ndarray]'=None) -> 'Ephemeris':
+    ''' Computes the sun path for an entire year on a regular UTC time grid, to be shared by all windows, rooms and time intervals of a house.
+      The grid starts one day early and ends one day late to cover the local days of all timezones.
+      The sun path is computed for the location's elevation; the effect of a room's floor level on sun angles (below 1e-8 degrees) is neglected.
+      Night-time samples are not evaluated (cf. getDaylightSunPath).
+      store: directory of precomputed ephemeris files to memory-map instead of computing (defaults to EPHEMERIS_STORE)
+      executor: optional thread or process pool to compute chunks of DAY_CHUNK days in parallel
+      days: sorted local midnights; if given and nothing is stored, only these days are computed and all other samples are NaN
+      returns: an Ephemeris value type
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> ephemeris = getEphemeris(location)
+  >>> print(ephemeris.path.altitude.shape, ephemeris.step)
+  (105696,) 300.0
+  >>> path = lookupSunPath(ephemeris, numpy.array([tz_datetime(CEST)(REF_YEAR, 6, 1, 12).timestamp()]))
+  >>> print(round(float(path.altitude[0]), 3), round(float(path.azimuth[0]), 3))
+  55.223 33.055
+  >>> print(lookupSunPath(ephemeris, numpy.array([tz_datetime(CEST)(REF_YEAR, 6, 1, 12, 1).timestamp()])))  # not on the grid
+  None
+  >>> days = numpy.array([tz_datetime(CEST)(REF_YEAR, 6, 1).timestamp()])
+  >>> partial = getEphemeris(location, days = days)
+  >>> print(lookupSunPath(partial, numpy.array([tz_datetime(CEST)(REF_YEAR, 6, 1, 12).timestamp()])) == path, numpy.isnan(partial.path.wattage).sum())
+  True 105408
+  '''
+    start = tz_datetime(UTC)(year, 1, 1).timestamp() - 86400.  # type: float
+    step = 60. * minute_interval  # type: float
+    timestamps = start + step * numpy.arange((daysinyear(year) + 2) * 86400 // int(step))
+    filename = os.path.join((EPHEMERIS_STORE if store is None else store), getEphemerisFilename(location, year, minute_interval)) if ((EPHEMERIS_STORE if store is None else store)) is not None else None  # type: _coconut.typing.Optional[str]
+    if filename is not None:
+        countEvent("storeHits" if os.path.exists(filename) else "storeMisses")
+    if filename is not None and os.path.exists(filename):
+        table = numpy.load(filename, mmap_mode="r")  # pages are shared between processes using the same file
+        return _coconut_tail_call(Ephemeris, location, start, step, SunPath(timestamps, table[0], table[1], table[2]))
+    if days is not None:  # partial ephemeris, e.g. for representative days
+        day = numpy.searchsorted(days, timestamps, "right") - 1
+        covered = (day >= 0) & (timestamps < days[day.clip(0)] + 86400.)
+        wattage, altitude, azimuth = numpy.full((3, len(timestamps)), numpy.nan)
+        path = getDaylightSunPath(location, timestamps[covered])  # type: SunPath
+        wattage[covered], altitude[covered], azimuth[covered] = path.wattage, path.altitude, path.azimuth
+        return _coconut_tail_call(Ephemeris, location, start, step, SunPath(timestamps, wattage, altitude, azimuth))
+    if executor is None:
+        return _coconut_tail_call(Ephemeris, location, start, step, getDaylightSunPath(location, timestamps))
+    size = DAY_CHUNK * 86400 // int(step)  # type: int
+    paths = [future.result() for future in [executor.submit(getDaylightSunPath, location, timestamps[index:index + size]) for index in range(0, len(timestamps), size)]]  # type: _coconut.typing.Sequence[SunPath]
+    return _coconut_tail_call(Ephemeris, location, start, step, SunPath(timestamps, *[numpy.concatenate(arrays) for arrays in zip(*[path[1:] for path in paths])]))
+
+
+@_coconut_tco
+def getEphemerisFilename(location: 'Location', year: 'int'=REF_YEAR, minute_interval: 'int'=MINUTE_STEPS) -> 'str':
+    ''' returns: the file name of a precomputed ephemeris, including the format version and the constants its night-time samples depend on, so that stale files are never memory-mapped '''
+    return _coconut_tail_call("ephemeris_v{}_{}_{}_{}_{}_{}_{}_{}.npy".format, EPHEMERIS_FORMAT, float(location.latitude), float(location.longitude), float(location.elevation), year, minute_interval, float(HORIZON), float(DAYLIGHT_MARGIN))
+
+
+def precomputeEphemeris(location: 'Location', store: 'str', year: 'int'=REF_YEAR, minute_interval: 'int'=MINUTE_STEPS) -> 'str':
+    ''' Writes the annual sun path table for a location to a binary file in the store directory, which getEphemeris then memory-maps.
+      returns: the file name written
+
+  >>> import tempfile
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> with tempfile.TemporaryDirectory() as store:
+  ...   print(os.path.basename(precomputeEphemeris(location, store)))
+  ...   ephemeris = getEphemeris(location, store = store)
+  ...   print(type(ephemeris.path.altitude).__name__, numpy.array_equal(ephemeris.path.azimuth, getEphemeris(location).path.azimuth, equal_nan = True))
+  ...   del ephemeris  # release memory map
+  ephemeris_v1_53.4613331_9.8276266_20.0_2015_5_-2.0_600.0.npy
+  memmap True
+  '''
+    ephemeris = getEphemeris(location, year, minute_interval, store=None)  # type: Ephemeris
+    filename = os.path.join(store, getEphemerisFilename(location, year, minute_interval))  # type: str
+    temporary = filename + ".%d.tmp" % os.getpid()  # type: str
+    with open(temporary, "wb") as fd:
+        numpy.save(fd, numpy.stack([ephemeris.path.wattage, ephemeris.path.altitude, ephemeris.path.azimuth]))
+    os.replace(temporary, filename)  # atomic for concurrent readers
+    return filename
+
+
+@_coconut_tco
+def getEphemerisSlice(ephemeris: 'Ephemeris', midnights: 'numpy.ndarray') -> 'Ephemeris':
+    ''' Selects the part of an ephemeris covering some local days, e.g. to send only that part to a worker process.
+      returns: an Ephemeris value type on the same time grid
+
+  >>> ephemeris = getEphemeris(Location(53.4613331, 9.8276266, 20.))
+  >>> midnights = getMidnights(REF_YEAR, CET)[100:132]
+  >>> part = getEphemerisSlice(ephemeris, midnights)
+  >>> timestamps = midnights[:, None] + 60. * getSampleMinutes(ENTIRE_DAY)[None, :]
+  >>> print(len(part.path.timestamps), all(numpy.array_equal(*values, equal_nan = True) for values in zip(lookupSunPath(part, timestamps), lookupSunPath(ephemeris, timestamps))))
+  9217 True
+  '''
+    first = max(0, int(math.floor((midnights.min() - ephemeris.start) / ephemeris.step)))  # type: int
+    last = min(len(ephemeris.path.timestamps), int(math.ceil((midnights.max() + 86400. - ephemeris.start) / ephemeris.step)) + 1)  # type: int
+    return _coconut_tail_call(Ephemeris, ephemeris.location, ephemeris.start + first * ephemeris.step, ephemeris.step, SunPath(*[values[first:last] for values in ephemeris.path]))
+
+
+@_coconut_tco
+def lookupSunPath(ephemeris: 'Ephemeris', timestamps: 'numpy.ndarray') -> '_coconut.typing.Optional[SunPath]':
+    ''' Picks the sun path for the given timestamps from a precomputed ephemeris.
+      returns: a SunPath value type, or None if any timestamp is not on the ephemeris' time grid
+  '''
+    index = (timestamps - ephemeris.start) / ephemeris.step
+    if not numpy.all(index == numpy.round(index)) or index.min() < 0 or index.max() >= len(ephemeris.path.timestamps):
+        countEvent("ephemerisMisses")
+        return None
+    countEvent("ephemerisHits")
+    index = index.astype(numpy.int64)
+    return _coconut_tail_call(SunPath, timestamps, ephemeris.path.wattage[index], ephemeris.path.altitude[index], ephemeris.path.azimuth[index])
+
+
+@_coconut_tco
+def interpolateSunPath(ephemeris: 'Ephemeris', timestamps: 'numpy.ndarray') -> '_coconut.typing.Optional[SunPath]':
+    ''' Interpolates the sun path for timestamps between the samples of a precomputed ephemeris linearly, the azimuth along the shorter arc.
+      returns: a SunPath value type, or None if any timestamp is outside of the ephemeris
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> timestamps = tz_datetime(CEST)(REF_YEAR, 6, 1).timestamp() + 60. * numpy.arange(24 * 60)
+  >>> exact, path = getSunPath(location, timestamps), interpolateSunPath(getEphemeris(location), timestamps)
+  >>> day = exact.wattage > 0.  # night-time samples of the ephemeris aren't evaluated
+  >>> print(float(abs(path.altitude - exact.altitude)[day].max()) < .2, float(abs(path.wattage - exact.wattage).max()) < 1., float(abs((path.azimuth - exact.azimuth + 180.) % 360. - 180.)[day].max()) < 1e-2)  # largest errors close to the horizon, due to refraction
+  True True True
+  '''
+    position = (timestamps - ephemeris.start) / ephemeris.step
+    index = numpy.floor(position).astype(numpy.int64)
+    if index.min() < 0 or index.max() + 1 >= len(ephemeris.path.timestamps):
+        countEvent("ephemerisMisses")
+        return None
+    countEvent("ephemerisHits")
+    fraction = position - index
+    path = ephemeris.path  # type: SunPath
+    interpolate = lambda values: values[index] + fraction * (values[index + 1] - values[index])
+    azimuth = path.azimuth[index] + fraction * ((path.azimuth[index + 1] - path.azimuth[index] + 180.) % 360. - 180.)
+    return _coconut_tail_call(SunPath, timestamps, interpolate(path.wattage), interpolate(path.altitude), numpy.where(azimuth > 180., azimuth - 360., numpy.where(azimuth < -180., azimuth + 360., azimuth)))
+
+
+def getAdaptiveDailySunWattages(location: 'Location', window: 'Window', timeInterval: 'TimeInterval', obstacles: '_coconut.typing.Sequence[Obstacle]', midnights: 'numpy.ndarray', tolerance: 'float'=1e-3) -> 'Tuple[numpy.ndarray, int]':
+    ''' Integrates the window's sun wattage over the time interval of several days with adaptive Simpson quadrature, instead of sampling every MINUTE_STEPS minutes.
+      Panels start one hour wide and are halved until their error estimate is within tolerance, all panels of all days in one batch per refinement level.
+      midnights: seconds since epoch of the local midnight of each day
+      tolerance: relative accuracy of each day's value
+      returns: array of hourly average wattages, one per day, and the number of evaluated samples
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> midnights = numpy.array([tz_datetime(CET)(2015, 3, 1).timestamp(), tz_datetime(CEST)(2015, 6, 1).timestamp()])
+  >>> exact, _ = getAdaptiveDailySunWattages(location, Window(5.), TimeInterval(9., 18.), [Obstacle(5, 30, 6, 7, .9)], midnights, 1e-8)
+  >>> amounts, evaluations = getAdaptiveDailySunWattages(location, Window(5.), TimeInterval(9., 18.), [Obstacle(5, 30, 6, 7, .9)], midnights)
+  >>> print(bool(numpy.all(abs(amounts - exact) <= 1e-3 * exact)), evaluations < 2 * 9 * 60)  # cheaper than sampling every minute
+  True True
+  >>> getAdaptiveDailySunWattages(location, Window(5.), TimeInterval(9., 9.), [], midnights)
+  (array([0., 0.]), 0)
+  '''
+    duration = 3600. * (timeInterval.toHour - timeInterval.fromHour)  # type: float
+    assert duration >= 0.
+    if duration == 0.:
+        return numpy.zeros_like(midnights), 0
+    evaluate = lambda timestamps: (_coconut_partial(getWindowWattages, {1: window, 2: obstacles}, 3))(getDaylightSunPath(location, timestamps, window.room.elevation))
+    panels = max(1, int(math.ceil(duration / 3600.)))  # type: int
+    edges = midnights[:, None] + 3600. * timeInterval.fromHour + (duration / panels) * numpy.arange(panels + 1)[None, :]  # one row per day
+    values = evaluate(numpy.concatenate([edges.ravel(), ((edges[:, :-1] + edges[:, 1:]) / 2.).ravel()]))
+    evaluations = values.size  # type: int
+    f_edges = values[:edges.size].reshape(edges.shape)
+    a, b = edges[:, :-1].ravel(), edges[:, 1:].ravel()
+    fa, fm, fb = f_edges[:, :-1].ravel(), values[edges.size:], f_edges[:, 1:].ravel()
+    day = numpy.repeat(numpy.arange(len(midnights)), panels)
+    whole = (b - a) / 6. * (fa + 4. * fm + fb)
+    allowed = tolerance * abs(numpy.bincount(day, whole, len(midnights))) / duration  # allowed error per second of each day, from the coarse estimate
+    amounts = numpy.zeros(len(midnights))
+    while a.size > 0:
+        m = (a + b) / 2.
+        values = evaluate(numpy.concatenate([(a + m) / 2., (m + b) / 2.]))
+        evaluations += values.size
+        flm, frm = values[:a.size], values[a.size:]
+        left, right = (m - a) / 6. * (fa + 4. * flm + fm), (b - m) / 6. * (fm + 4. * frm + fb)
+        error = left + right - whole
+        done = (abs(error) <= 15. * allowed[day] * (b - a)) | (b - a <= MIN_PANEL)
+        amounts += numpy.bincount(day[done], (left + right + error / 15.)[done], len(midnights))  # Richardson extrapolation
+        split = ~done
+        a, b, day = numpy.concatenate([a[split], m[split]]), numpy.concatenate([m[split], b[split]]), numpy.tile(day[split], 2)
+        fa, fm, fb = numpy.concatenate([fa[split], fm[split]]), numpy.concatenate([flm[split], frm[split]]), numpy.concatenate([fm[split], fb[split]])
+        whole = numpy.concatenate([left[split], right[split]])
+    return amounts / duration, evaluations
+
+
+@_coconut_tco
+def getTimeNormalizedSunWattage(date: 'datetime.datetime', location: 'Location', window: 'Window', timeInterval: 'TimeInterval'=ENTIRE_DAY, obstacles: '_coconut.typing.Sequence[Obstacle]'=[], minute_interval: 'int'=MINUTE_STEPS, tolerance: '_coconut.typing.Optional[float]'=None) -> 'float':
     ''' Computes radiation by the minute, then normalize by time interval for an hourly value.
+      This is a thin wrapper around getDailySunWattages, which works on seconds since epoch instead of datetime objects.
+      tolerance: if given, integrate adaptively to this relative accuracy instead of sampling every minute_interval minutes (cf. getAdaptiveDailySunWattages)
       returns: hourly average radiation (for observed time interval)
 
   >>> location = Location(53.4613331, 9.8276266, 20.)
@@ -252,29 +1150,173 @@ def getTimeNormalizedSunWattage(date: 'datetime.datetime', location: 'Location',
   228.892
   >>> print(round(getTimeNormalizedSunWattage(tz_datetime(CET)(2015, 3, 1), location, Window(5.), TimeInterval(9., 18.)), 3))  # average over entire day this is very little
   573.894
+  >>> print(round(getTimeNormalizedSunWattage(tz_datetime(CET)(2015, 3, 1), location, Window(5.), TimeInterval(9., 18.), tolerance = 1e-3), 1))  # exact integral instead of 5 minute samples
+  572.0
   '''
-    amount = 0.
-    minutes_from = int((timeInterval.fromHour % 1.) * 60)  # type: int
-    minutes_to = int((timeInterval.toHour % 1.) * 60)  # type: int
-    if minutes_to == 0:  # to avoid computation on last hour (e.g. 4..5 means not compute first minute of 5)
-        minutes_to = -1  # to avoid computation on last hour (e.g. 4..5 means not compute first minute of 5)
-    for hour in range(int(timeInterval.fromHour), int(timeInterval.toHour) + 1):
-        for minute in range(minutes_from if hour == int(timeInterval.fromHour) else 0, minutes_to + 1 if hour == int(timeInterval.toHour) else 60, minute_interval):
-            time = tz_datetime(date.tzinfo)(date.year, date.month, date.day, hour, minute)  # create timestamp to compute radiation for
-            radiation = getAngleCorrectedSunWattage(time, location, window)
-            shadowFactor = 1.  # start with "no shadowing"
-            for obstacle in obstacles:  # using the angle corrected wattage, we only need to consider sun altitude in the following step
-                shadowFactor = min(shadowFactor, getShadowing(radiation.altitude, window.direction, obstacle, window.room.elevation))  # min for the obstacle blocking the most
-            assert radiation.altitude >= 0. and radiation.altitude <= 180.
-            assert radiation.azimuth >= -180. and radiation.azimuth <= 180.
-            amount += radiation.wattage * shadowFactor
+    assert timeInterval.toHour >= timeInterval.fromHour
+    return _coconut_tail_call((float), getDailySunWattages(location, window, timeInterval, obstacles, numpy.array([getLocalMidnight(date)]), tolerance=tolerance, minute_interval=minute_interval)[0])
+
+
+@_coconut_tco
+def getDailySunWattages(location: 'Location', window: 'Window', timeInterval: 'TimeInterval', obstacles: '_coconut.typing.Sequence[Obstacle]', midnights: 'numpy.ndarray', ephemeris: '_coconut.typing.Optional[Ephemeris]'=None, tolerance: '_coconut.typing.Optional[float]'=None, minute_interval: 'int'=MINUTE_STEPS, interpolate: 'bool'=False) -> 'numpy.ndarray':
+    ''' Computes the time normalized sun wattage (cf. getTimeNormalizedSunWattage) for several days in one batch.
+      midnights: seconds since epoch of the local midnight of each day
+      interpolate: if true, interpolate the ephemeris between its samples (cf. interpolateSunPath) instead of requiring the sample times on its time grid
+      tolerance: if given, integrate adaptively instead of sampling (cf. getAdaptiveDailySunWattages); the ephemeris isn't used then
+      returns: array of hourly average wattages, one per day
+  '''
+    if tolerance is not None:
+        return getAdaptiveDailySunWattages(location, window, timeInterval, obstacles, midnights, tolerance)[0]
     norm = (60. / MINUTE_STEPS) * (timeInterval.toHour - timeInterval.fromHour)  # type: float
-    assert norm >= 0.
-    return amount / norm if norm != 0. else 0.
+    if norm == 0.:
+        return _coconut_tail_call(numpy.zeros_like, midnights)
+    timestamps = midnights[:, None] + 60. * getSampleMinutes(timeInterval, minute_interval)[None, :]  # one row per day
+    assert ephemeris is None or ephemeris.location == location
+    path = (lambda _coconut_none_coalesce_item: getDaylightSunPath(location, timestamps, window.room.elevation) if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)((((interpolateSunPath if interpolate else lookupSunPath)(ephemeris, timestamps)) if ephemeris is not None else None))  # type: SunPath
+    return getWindowWattages(path, window, obstacles).sum(axis=1) / norm
+
+
+def getLastSunday(year: 'int', month: 'int') -> 'int':
+    ''' returns: the zero-based day of year of the last Sunday of a month
+
+  >>> getLastSunday(2015, 3), getLastSunday(2015, 10)  # March 29th and October 25th
+  (87, 297)
+  '''
+    last = datetime.date(year, month, calendar.monthrange(year, month)[1])  # type: datetime.date
+    return last.timetuple().tm_yday - 1 - (last.weekday() + 1) % 7
+
+
+@memoize
+@_coconut_tco
+def getUtcOffsets(year: 'int'=REF_YEAR, timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None) -> 'numpy.ndarray':
+    ''' Computes the UTC offset at the local midnight of each day of a year from the timezone's transitions, instead of localizing each day.
+      For pytz timezones, only the days close to a transition are localized; all other days are looked up in the transition table.
+      time_dst: daylight saving time offset to use with timezone's standard time offset according to the European Union rule:
+                from the day after the last Sunday in March through the last Sunday in October (switching at 01:00 UTC), independent of the system's locale;
+                other pairs raise a ValueError, as their switching days are unknown (use a pytz timezone instead)
+      returns: array of seconds east of UTC, one per day
+
+  >>> berlin = pytz.timezone("Europe/Berlin")
+  >>> offsets = getUtcOffsets(2015, berlin)
+  >>> print(offsets[[0, 87, 88, 297, 298]] / 3600.)  # DST from March 30th to October 25th
+  [1. 1. 2. 2. 1.]
+  >>> numpy.array_equal(getUtcOffsets(2015, CET, CEST), offsets)
+  True
+  >>> getUtcOffsets(2015, mktz(-5), mktz(-4))
+  Traceback (most recent call last):
+  ...
+  ValueError: daylight saving time switching days are only known for European Union timezones (standard time offsets 0, 1 or 2 hours and one hour ahead), not for -5.0 and -4.0 hours; use a pytz timezone instead
+  >>> all(numpy.array_equal(getUtcOffsets(year, pytz.timezone(name)), [pytz.timezone(name).localize(datetime.datetime(year, 1, 1) + datetime.timedelta(days = day)).utcoffset().total_seconds() for day in range(daysinyear(year))]) for name in ("America/Havana", "America/Sao_Paulo", "Asia/Tehran", "Australia/Lord_Howe", "Europe/London", "UTC") for year in (2015, 2016))
+  True
+  '''
+    days = daysinyear(year)  # type: int
+    if time_dst is not None:
+        standard, daylight = timezone.utcoffset(None).total_seconds(), time_dst.utcoffset(None).total_seconds()
+        if standard / 3600. not in EU_STANDARD_HOURS or daylight != standard + 3600.:
+            raise ValueError("daylight saving time switching days are only known for European Union timezones (standard time offsets 0, 1 or 2 hours and one hour ahead), not for {} and {} hours; use a pytz timezone instead".format(standard / 3600., daylight / 3600.))
+        day = numpy.arange(days)
+        return _coconut_tail_call(numpy.where, (day > getLastSunday(year, 3)) & (day <= getLastSunday(year, 10)), daylight, standard)
+    dates = [datetime.datetime(year, 1, 1) + datetime.timedelta(days=day) for day in range(days)]  # type: _coconut.typing.Sequence[datetime.datetime]
+    transitions = getattr(timezone, "_utc_transition_times", None)  # type: _coconut.typing.Optional[_coconut.typing.Sequence[datetime.datetime]]  # pytz time zones with daylight saving time
+    if transitions is None:  # fixed offset, or another kind of time zone
+        if isinstance(timezone, Timezone):
+            return _coconut_tail_call(numpy.full, days, timezone.utcoffset(None).total_seconds())
+        return _coconut_tail_call(numpy.array, [(timezone.localize(date) if hasattr(timezone, "localize") else date.replace(tzinfo=timezone)).utcoffset().total_seconds() for date in dates])
+    times = numpy.array([calendar.timegm(transition.timetuple()) for transition in transitions], dtype=float)
+    offsets = numpy.array([info[0].total_seconds() for info in timezone._transition_info])
+    naive = calendar.timegm((year, 1, 1, 0, 0, 0)) + 86400. * numpy.arange(days)
+    index = numpy.searchsorted(times, naive, "right") - 1
+    result = offsets[numpy.maximum(index, 0)]  # offset at the naive time, which is the local one unless a transition is close
+    close = (naive - times[numpy.maximum(index, 0)] < 86400.) | ((index + 1 < len(times)) & (times[numpy.minimum(index + 1, len(times) - 1)] - naive <= 86400.))
+    for day in numpy.flatnonzero(close):  # exactly like pytz, also for ambiguous and skipped midnights
+        result[day] = timezone.localize(dates[day]).utcoffset().total_seconds()  # exactly like pytz, also for ambiguous and skipped midnights
+    return result
+
+
+@memoize
+@timed("midnights")
+def getMidnights(year: 'int'=REF_YEAR, timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None) -> 'numpy.ndarray':
+    ''' Computes the local midnights of all days of a year (cf. getUtcOffsets).
+      returns: array of seconds since epoch, one per day
+
+  >>> midnights = getMidnights(2015, pytz.timezone("Europe/Berlin"))
+  >>> print(len(midnights), numpy.diff(midnights)[numpy.diff(midnights) != 86400.])  # DST starts and ends
+  365 [82800. 90000.]
+  >>> print(getMidnights(2015, CET)[0] == tz_datetime(CET)(2015, 1, 1).timestamp(), getMidnights(2016)[-1] == tz_datetime(UTC)(2016, 12, 31).timestamp())  # fixed timezones
+  True True
+  '''
+    naive = calendar.timegm((year, 1, 1, 0, 0, 0)) + 86400. * numpy.arange(daysinyear(year))  # midnights as if in UTC
+    return naive - getUtcOffsets(year, timezone, time_dst)
+
 
+def getAlignedMidnights(year: 'int', timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, reference: 'int'=REF_YEAR) -> 'numpy.ndarray':
+    ''' Maps the local midnights of a year onto the same days of year of a reference year, keeping the year's own UTC offsets (e.g. its DST dates).
+      This way, the sun path (and ephemeris) of the reference year can be reused for other years, neglecting the drift of the sun's position within the leap year cycle.
+      Days are aligned by day of year rather than calendar date, because the direct radiation model depends on the day of year; the last day of a leap year repeats the last day of a common reference year.
+      Compared with computing each year exactly, annual sums differ by about 1e-4 relatively, and up to 3e-3 for short intervals with the sun close to the horizon (measured for 2012 to 2018).
+      returns: array of seconds since epoch in the reference year, one per day of the year
 
-def getDailySunWattageSumForEntireYear(location: 'Location', window: 'Window', timeInterval: 'TimeInterval', obstacles: '_coconut.typing.Sequence[Obstacle]'=[], year: 'int'=REF_YEAR, timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None) -> 'float':
+  >>> aligned = getAlignedMidnights(2016, pytz.timezone("Europe/Berlin"))  # leap year with DST from March 27th to October 30th
+  >>> print(len(aligned), aligned[-1] - aligned[-2], [datetime.datetime.fromtimestamp(aligned[day], UTC).strftime("%m-%d %H:%M") for day in (86, 87, 303, 304)])  # DST of 2016, on the days of year of 2015
+  366 0.0 ['03-27 23:00', '03-28 22:00', '10-30 22:00', '10-31 23:00']
+  >>> numpy.array_equal(getAlignedMidnights(REF_YEAR, CET, CEST), getMidnights(REF_YEAR, CET, CEST))
+  True
+  '''
+    days = numpy.minimum(numpy.arange(daysinyear(year)), daysinyear(reference) - 1)
+    return calendar.timegm((reference, 1, 1, 0, 0, 0)) + 86400. * days - getUtcOffsets(year, timezone, time_dst)
+
+
+@_coconut_tco
+def getRepresentativeDays(midnights: 'numpy.ndarray', day_step: 'int'=DAY_STEP) -> 'numpy.ndarray':
+    ''' Selects every day_step-th day, the first and last day, the days around the solstices, and the days before and after each DST transition.
+      returns: sorted array of day indices
+
+  >>> getRepresentativeDays(getMidnights(2015, pytz.timezone("Europe/Berlin")), 60).tolist()  # DST starts on day 87 and ends on day 297
+  [0, 60, 87, 88, 120, 170, 171, 172, 180, 240, 297, 298, 300, 353, 354, 355, 360, 364]
+  '''
+    year = datetime.datetime.utcfromtimestamp(midnights[len(midnights) // 2]).year  # type: int
+    solstices = [datetime.date(year, month, 21).timetuple().tm_yday - 1 + offset for month in (6, 12) for offset in (-1, 0, 1)]  # type: _coconut.typing.Sequence[int]
+    transitions = numpy.flatnonzero(numpy.diff(midnights) != 86400.)  # last day before a change of the UTC offset
+    days = numpy.concatenate([numpy.arange(0, len(midnights), day_step), [len(midnights) - 1], solstices, transitions, transitions + 1])
+    return _coconut_tail_call(numpy.unique, days[(days >= 0) & (days < len(midnights))])
+
+
+def getSampledDailySunWattages(location: 'Location', window: 'Window', timeInterval: 'TimeInterval', obstacles: '_coconut.typing.Sequence[Obstacle]', midnights: 'numpy.ndarray', day_step: 'int'=DAY_STEP, ephemeris: '_coconut.typing.Optional[Ephemeris]'=None, tolerance: '_coconut.typing.Optional[float]'=None) -> 'Tuple[numpy.ndarray, float]':
+    ''' Computes the daily wattages (cf. getDailySunWattages) only for representative days (cf. getRepresentativeDays) and interpolates the other days linearly.
+      Days with the same UTC offset are interpolated separately, because the time interval moves relative to the sun at DST transitions.
+      The error is estimated by predicting each interior representative day from its neighbors, which has twice the spacing and thus about four times the error.
+      returns: array of daily wattages, one per day, and the estimated absolute error of their sum
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> midnights = getMidnights(2015, pytz.timezone("Europe/Berlin"))
+  >>> full = getDailySunWattages(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], midnights).sum()
+  >>> amounts, error = getSampledDailySunWattages(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], midnights)
+  >>> print(abs(amounts.sum() - full) < 1e-2 * full, abs(amounts.sum() - full) < 3. * error, error < 1e-2 * full)
+  True True True
+  '''
+    days = getRepresentativeDays(midnights, day_step)
+    values = getDailySunWattages(location, window, timeInterval, obstacles, midnights[days], ephemeris, tolerance)
+    segments = numpy.concatenate([[0], numpy.cumsum(numpy.diff(midnights) != 86400.)])  # same UTC offset
+    amounts = numpy.zeros_like(midnights)
+    error = 0.  # type: float
+    for segment in numpy.unique(segments):
+        inside = segments[days] == segment  # the segment's first and last days are representative days
+        known, known_values = days[inside], values[inside]
+        span = numpy.flatnonzero(segments == segment)
+        amounts[span] = numpy.interp(span, known, known_values)
+        if len(known) > 2:
+            predicted = known_values[:-2] + (known_values[2:] - known_values[:-2]) * (known[1:-1] - known[:-2]) / (known[2:] - known[:-2])
+            error += float((abs(known_values[1:-1] - predicted) * (known[2:] - known[:-2]) / 12.).sum())  # interpolation error of both gaps is a third of the residual times half their length, and each gap is covered twice
+    return amounts, error
+
+
+def getDailySunWattageSumForEntireYear(location: 'Location', window: 'Window', timeInterval: 'TimeInterval', obstacles: '_coconut.typing.Sequence[Obstacle]'=[], year: 'int'=REF_YEAR, timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, ephemeris: '_coconut.typing.Optional[Ephemeris]'=None, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None, tolerance: '_coconut.typing.Optional[float]'=None, day_step: '_coconut.typing.Optional[int]'=None, reference: '_coconut.typing.Optional[int]'=None) -> 'float':
     ''' Return sum of daily average radiation amount.
+      ephemeris: optional precomputed sun path for the location and year, used if the sample times are on its time grid
+      executor: optional thread or process pool to compute chunks of DAY_CHUNK days in parallel; the result doesn't depend on the chunking
+      tolerance: if given, integrate each day adaptively to this relative accuracy instead of sampling every MINUTE_STEPS minutes
+      day_step: if given, compute only representative days and interpolate the others (cf. getSampledDailySunWattages)
+      reference: if given, derive the year's sum from the sun path of this reference year (cf. getAlignedMidnights), e.g. to reuse its ephemeris for other years
       returns: computed aggregate wattage
 
   >>> location = Location(53.4613331, 9.8276266, 20.)
@@ -298,20 +1340,55 @@ def getDailySunWattageSumForEntireYear(location: 'Location', window: 'Window', t
   And again, with a floor height of 5 meters, which should result in more sunlight
   >>> print(round(getDailySunWattageSumForEntireYear(location, Window(0., room = Room(elevation = 5.)), TimeInterval(11., 15.), [Obstacle(5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin")), 3))  # no dst in this timezone
   266687.268
+
+  Share a precomputed ephemeris, which gives the same result:
+  >>> print(round(getDailySunWattageSumForEntireYear(location, Window(0., room = Room(elevation = 5.)), TimeInterval(11., 15.), [Obstacle(5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), ephemeris = getEphemeris(location)), 3))
+  266687.268
+
+  Compute chunks of days in parallel, which gives exactly the same result:
+  >>> expected = getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"))
+  >>> with concurrent.futures.ThreadPoolExecutor(4) as executor:
+  ...   print(getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), executor = executor) == expected)
+  True
+  >>> with concurrent.futures.ProcessPoolExecutor(2) as executor:
+  ...   print(getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), executor = executor) == expected)
+  True
+
+  Integrate adaptively, which is within the requested accuracy of the exact integral:
+  >>> exact = getDailySunWattageSumForEntireYear(location, Window(0., room = Room(elevation = 0.)), TimeInterval(11., 15.), [Obstacle(5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), tolerance = 1e-8)
+  >>> print(round(exact, 1), abs(getDailySunWattageSumForEntireYear(location, Window(0., room = Room(elevation = 0.)), TimeInterval(11., 15.), [Obstacle(5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), tolerance = 1e-3) - exact) <= 1e-3 * exact)
+  257698.9 True
+
+  Estimate from every 10th day (plus solstices and DST transitions), which is close to the full computation:
+  >>> full = getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"))
+  >>> print(abs(getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], timezone = pytz.timezone("Europe/Berlin"), day_step = 10) - full) < 1e-2 * full)
+  True
+
+  Derive another year from the reference year's ephemeris, which is close to computing that year:
+  >>> exact = getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], 2012, pytz.timezone("Europe/Berlin"))
+  >>> print(round(exact, 3), abs(getDailySunWattageSumForEntireYear(location, Window(-20.), TimeInterval(7., 21.), [Obstacle(-5, 30, 6, 7, .9)], 2012, pytz.timezone("Europe/Berlin"), ephemeris = getEphemeris(location), reference = REF_YEAR) - exact) < 1e-3 * exact)
+  117609.694 True
   '''
-    amount = 0.
-    for days in range(0, (daysinyear)(year)):
-        raw_date = datetime.datetime(year, 1, 1) + datetime.timedelta(days=days)
-        if time_dst is None:  # using named timezone from pytz or non-dst fixed timezone
-            date = timezone.localize(raw_date)
-        else:
-            date = tz_datetime(time_dst if is_dst(raw_date) else timezone)(year, raw_date.month, raw_date.day)  # compute day of year WARN: is_dst uses system's locale
-        amount += timeInterval.weekFactor * getTimeNormalizedSunWattage(date, location, window, timeInterval, obstacles)
-    return amount
+    days = getMidnights(year, timezone, time_dst) if reference is None else getAlignedMidnights(year, timezone, time_dst, reference)
+    if day_step is not None:
+        return timeInterval.weekFactor * float(getSampledDailySunWattages(location, window, timeInterval, obstacles, days, day_step, ephemeris, tolerance)[0].sum())
+    amounts = (getDailySunWattages(location, window, timeInterval, obstacles, days, ephemeris, tolerance) if executor is None else numpy.concatenate([future.result() for future in [executor.submit(getDailySunWattages, location, window, timeInterval, obstacles, days[day:day + DAY_CHUNK], getEphemerisSlice(ephemeris, days[day:day + DAY_CHUNK]) if ephemeris is not None else None, tolerance) for day in range(0, len(days), DAY_CHUNK)]]))  # type: numpy.ndarray  # each work item only carries the sun path of its days
+    return timeInterval.weekFactor * float(amounts.sum())  # summed in day order, independent of chunking
 
 
-def getHouseScore(location: 'Location', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None) -> 'float':
+@timed("houseScore")
+@_coconut_tco
+def getHouseScore(location: 'Location', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, store: '_coconut.typing.Optional[str]'=None, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None, tolerance: '_coconut.typing.Optional[float]'=None, day_step: '_coconut.typing.Optional[int]'=None, horizon: 'bool'=False, years: '_coconut.typing.Optional[_coconut.typing.Sequence[int]]'=None, cache: '_coconut.typing.Optional[ResultStore]'=None) -> 'float':
     ''' Second experiment. Simply show sum of annual amount of daily-hour-normalized sun wattage to compare different house options.
+      The sun path is computed only once for the location and shared by all windows, rooms and time intervals.
+      Obstacles are indexed once, so that each window only considers the obstacles that can shadow it (cf. getCandidateObstacles), compiled for the window's elevation.
+      store: directory of precomputed ephemeris files (cf. getEphemeris)
+      executor: optional thread or process pool to compute chunks of days in parallel (cf. getDailySunWattageSumForEntireYear)
+      tolerance: if given, integrate adaptively to this relative accuracy instead of sampling every MINUTE_STEPS minutes (no ephemeris is needed then)
+      day_step: if given, estimate the score from representative days (cf. estimateHouseScore)
+      horizon: if true, look up shadowing in horizon masks of all obstacles per window elevation (cf. getHorizonMask), which is faster for many obstacles, but approximate
+      years: if given, average the score over these years, e.g. TYPICAL_YEARS, all derived from the ephemeris of REF_YEAR (cf. getAlignedMidnights), so that this costs about the same as a single year
+      cache: optional persistent result store, where the score is looked up by its inputs (cf. getResultKey) before computing it
       returns: a score >= 0
 
   Define the reference location, windows, times and obstacles:
@@ -325,10 +1402,15 @@ def getHouseScore(location: 'Location', windows: '_coconut.typing.Sequence[Windo
   >>> print(round(getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin")), 4))
   52799.2992
 
-  Use explicit CET/CEST timezones. TODO This test passes only on a CET/CEST machine, because it derives DST'S start/end dates from the current system locale
+  Use explicit CET/CEST timezones, with daylight saving time according to the European Union rule (cf. getUtcOffsets):
   >>> print(round(getHouseScore(location, windows, obstacles, times, timezone = CET, time_dst = CEST), 4))
   52799.2992
 
+  Compute chunks of days on a thread pool:
+  >>> with concurrent.futures.ThreadPoolExecutor(4) as executor:
+  ...   print(round(getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), executor = executor), 4))
+  52799.2992
+
   Start a new example:
   >>> print(round(getHouseScore(location, windows[1:2], obstacles[1:2], times, timezone = CET, time_dst = CEST), 4))
   29222.2158
@@ -343,18 +1425,549 @@ def getHouseScore(location: 'Location', windows: '_coconut.typing.Sequence[Windo
   >>> windows[1] = windows[1]._replace(room = windows[1].room._replace(times = time))  # update time interval
   >>> print(round(getHouseScore(location, windows[1:2], obstacles[1:2], times[:1], timezone = CET, time_dst = CEST), 4))
   58162.953
+
+  Use horizon masks instead of the obstacles, which is close:
+  >>> exact = getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"))
+  >>> print(round(exact, 4), abs(getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), horizon = True) - exact) < 1e-3 * exact)
+  91096.297 True
+
+  Average over a typical year, which differs only slightly from the reference year:
+  >>> typical = getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), years = TYPICAL_YEARS)
+  >>> print(round(typical, 4), abs(typical - exact) < 1e-2 * exact)
+  91159.3635 True
+
+  Keep scores in a persistent result store, e.g. for the next run:
+  >>> import tempfile
+  >>> with tempfile.TemporaryDirectory() as directory:
+  ...   print(getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), cache = ResultStore(directory)) == exact)
+  ...   results = ResultStore(directory)
+  ...   print(getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), cache = results) == exact, results.info())
+  True
+  True CacheInfo(hits=1, misses=0, evictions=0, size=1, bytes=192)
   '''
+    if cache is not None:
+        key = getResultKey(location, windows, obstacles, timeIntervals, timezone, time_dst, tolerance, day_step, horizon, years)  # type: str
+        return _coconut_tail_call((lambda _coconut_none_coalesce_item: cache.put(key, getHouseScore(location, windows, obstacles, timeIntervals, timezone, time_dst, store, executor, tolerance, day_step, horizon, years)) if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item), cache.get(key))
+    if day_step is not None and years is None:
+        return estimateHouseScore(location, windows, obstacles, timeIntervals, timezone, time_dst, day_step, store, tolerance, horizon)[0]
     amount = 0.
+    ephemeris = getEphemeris(location, store=store, executor=executor) if tolerance is None else None  # type: _coconut.typing.Optional[Ephemeris]
+    index = getObstacleIndex(obstacles)  # type: ObstacleIndex
+    masks = {}  # type: Dict[float, HorizonMask]
     for window in windows:
         assert window.room is None or len(window.room) > 0
+        if horizon and window.room.elevation not in masks:
+            masks[window.room.elevation] = getHorizonMask(obstacles, window.room.elevation)
+        candidates = masks[window.room.elevation] if horizon else [compileObstacle(obstacle, window.room.elevation) for obstacle in getCandidateObstacles(index, window.direction)]
         for timeInterval in (lambda _coconut_none_coalesce_item: timeIntervals if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(window.room.times):  # use default if nothing defined on room
-            amount += window.room.relevance * getDailySunWattageSumForEntireYear(location, window, timeInterval, obstacles, timezone=timezone, time_dst=time_dst)
+            if years is None:
+                amount += window.room.relevance * getDailySunWattageSumForEntireYear(location, window, timeInterval, candidates, timezone=timezone, time_dst=time_dst, ephemeris=ephemeris, executor=executor, tolerance=tolerance)
+            else:
+                amount += window.room.relevance * sum((getDailySunWattageSumForEntireYear(location, window, timeInterval, candidates, year, timezone, time_dst, ephemeris, executor, tolerance, day_step, REF_YEAR) for year in years)) / len(years)
     return amount
 
 
+@timed("houseScore")
+def estimateHouseScore(location: 'Location', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, day_step: 'int'=DAY_STEP, store: '_coconut.typing.Optional[str]'=None, tolerance: '_coconut.typing.Optional[float]'=None, horizon: 'bool'=False) -> 'Tuple[float, float]':
+    ''' Estimates the house score (cf. getHouseScore) from representative days only (cf. getSampledDailySunWattages), e.g. for ranking many houses.
+      The sun path is computed only for the representative days, and shared by all windows, rooms and time intervals (cf. getEphemeris).
+      returns: the estimated score and its estimated absolute error
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> windows = [Window(-135., Room(0., 1.), 2.), Window(45., Room(0, .5), 2.), Window(-45., Room(0., .5), .3)]
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> obstacles = [Obstacle(50, 20, 10, 10, .9), Obstacle(-5, 30, 5, 4, .9), Obstacle(-45, 10, 10, 10, .9), Obstacle(-135, 15, 10, 10, .8)]
+  >>> score, error = estimateHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"))
+  >>> print(round(score, 4), abs(score - 52799.2992) < error < 1e-2 * score)
+  52758.051 True
+  >>> getHouseScore(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"), day_step = 10) == score
+  True
+  '''
+    midnights = getMidnights(REF_YEAR, timezone, time_dst)
+    ephemeris = getEphemeris(location, store=store, days=midnights[getRepresentativeDays(midnights, day_step)]) if tolerance is None else None  # type: _coconut.typing.Optional[Ephemeris]
+    amount, error = 0., 0.
+    index = getObstacleIndex(obstacles)  # type: ObstacleIndex
+    masks = {}  # type: Dict[float, HorizonMask]
+    for window in windows:
+        assert window.room is None or len(window.room) > 0
+        if horizon and window.room.elevation not in masks:
+            masks[window.room.elevation] = getHorizonMask(obstacles, window.room.elevation)
+        candidates = masks[window.room.elevation] if horizon else [compileObstacle(obstacle, window.room.elevation) for obstacle in getCandidateObstacles(index, window.direction)]
+        for timeInterval in (lambda _coconut_none_coalesce_item: timeIntervals if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(window.room.times):  # use default if nothing defined on room
+            amounts, amounts_error = getSampledDailySunWattages(location, window, timeInterval, candidates, midnights, day_step, ephemeris, tolerance)
+            amount += window.room.relevance * timeInterval.weekFactor * float(amounts.sum())
+            error += window.room.relevance * timeInterval.weekFactor * amounts_error
+    return amount, error
+
+
+@_coconut_tco
+def getLatitudeEphemeris(location: 'Location', store: '_coconut.typing.Optional[str]'=None, step: 'float'=LATITUDE_STEP) -> 'Ephemeris':
+    ''' Interpolates a location's ephemeris linearly between those of the enclosing multiples of step degrees latitude at the same longitude and elevation,
+      which are shared by all latitudes in between, as the sun path changes smoothly with latitude. The azimuth is interpolated along the shorter arc.
+      Samples evaluated for only one of them (around sunrise and sunset, cf. getDaylightSunPath) are taken from that one.
+      returns: an Ephemeris value type for the location
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> interpolated, exact = getLatitudeEphemeris(location).path, getEphemeris(location).path
+  >>> day = exact.altitude > 2.  # closer to the horizon, some samples are evaluated for only one of the latitudes
+  >>> print(float(abs(interpolated.altitude - exact.altitude)[day].max()) < .01, float(abs((interpolated.azimuth - exact.azimuth + 180.) % 360. - 180.)[day].max()) < .01, float(numpy.nansum(abs(interpolated.wattage - exact.wattage)) / numpy.nansum(exact.wattage)) < 1e-3)
+  True True True
+  '''
+    below = math.floor(location.latitude / step) * step  # type: float
+    lower = getEphemeris(location._replace(latitude=below), store=store, executor=None)  # type: Ephemeris
+    if below == location.latitude:
+        return _coconut_tail_call(lower._replace, location=location)
+    upper = getEphemeris(location._replace(latitude=below + step), store=store, executor=None)  # type: Ephemeris
+    weight = (location.latitude - below) / step  # type: float
+    mix = lambda low, high, difference: numpy.where(numpy.isnan(low), high, numpy.where(numpy.isnan(high), low, low + weight * difference))
+    a, b = lower.path, upper.path
+    with numpy.errstate(invalid="ignore"):
+        azimuth = mix(a.azimuth, b.azimuth, (b.azimuth - a.azimuth + 180.) % 360. - 180.)
+        path = SunPath(a.timestamps, mix(a.wattage, b.wattage, b.wattage - a.wattage), mix(a.altitude, b.altitude, b.altitude - a.altitude), numpy.where(azimuth > 180., azimuth - 360., numpy.where(azimuth < -180., azimuth + 360., azimuth)))
+    return _coconut_tail_call(Ephemeris, location, lower.start, lower.step, path)
+
+
+@_coconut_tco
+def getGridHouseScores(latitudes: '_coconut.typing.Sequence[float]', longitudes: '_coconut.typing.Sequence[float]', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, elevation: 'float'=0., store: '_coconut.typing.Optional[str]'=None, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None) -> 'numpy.ndarray':
+    ''' Scores the same house design (cf. getHouseScore) on a grid of candidate locations, e.g. for a site map.
+      The sun path is computed only for multiples of LATITUDE_STEP degrees latitude at the grid's central longitude, and interpolated for the latitudes in between (cf. getLatitudeEphemeris),
+      so a grid spanning a few degrees needs a few ephemerides for any number of rows. Other longitudes reuse a row's sun path shifted in time,
+      because the sun reaches the same hour angle four minutes later per degree further west; the ephemeris is interpolated between its samples (cf. interpolateSunPath).
+      The obstacles are indexed and compiled once for the entire grid, and the local midnights are computed once for the timezone.
+      elevation: meters above sea level, the same for all locations
+      executor: optional process or thread pool to score latitudes in parallel
+      returns: array of scores with one row per latitude and one column per longitude
+
+  >>> windows = [Window(-135., Room(0., 1.), 2.), Window(45., Room(0, .5), 2.), Window(-45., Room(0., .5), .3)]
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> obstacles = [Obstacle(50, 20, 10, 10, .9), Obstacle(-5, 30, 5, 4, .9), Obstacle(-45, 10, 10, 10, .9), Obstacle(-135, 15, 10, 10, .8)]
+  >>> grid = getGridHouseScores([53.4613331, 48.], [9.8276266, 8., 13.], windows, obstacles, times, pytz.timezone("Europe/Berlin"), elevation = 20.)
+  >>> exact = [[getHouseScore(Location(latitude, longitude, 20.), windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin")) for longitude in (9.8276266, 8., 13.)] for latitude in (53.4613331, 48.)]
+  >>> print(grid.shape, round(float(grid[0, 0]), 1), float(abs(grid / exact - 1.).max()) < 1e-3)
+  (2, 3) 52800.0 True
+  >>> misses = getEphemeris.info().misses
+  >>> _ = getGridHouseScores(list(numpy.linspace(53.05, 53.95, 10)), [9.8276266], windows, obstacles, times, pytz.timezone("Europe/Berlin"), elevation = 20.)
+  >>> getEphemeris.info().misses - misses  # for latitudes 53 and 54
+  2
+  '''
+    if executor is not None:
+        return _coconut_tail_call(numpy.vstack, [future.result() for future in [executor.submit(getGridHouseScores, [latitude], longitudes, windows, obstacles, timeIntervals, timezone, time_dst, elevation, store) for latitude in latitudes]])
+    index = getObstacleIndex(obstacles)  # type: ObstacleIndex
+    candidates = [[compileObstacle(obstacle, window.room.elevation) for obstacle in getCandidateObstacles(index, window.direction)] for window in windows]  # type: List[_coconut.typing.Sequence[CompiledObstacle]]
+    midnights = getMidnights(REF_YEAR, timezone, time_dst)
+    center = (min(longitudes) + max(longitudes)) / 2.  # type: float
+    scores = numpy.zeros((len(latitudes), len(longitudes)))
+    for row, latitude in enumerate(latitudes):
+        reference = Location(float(latitude), center, elevation)
+        ephemeris = getLatitudeEphemeris(reference, store)  # type: Ephemeris
+        for column, longitude in enumerate(longitudes):
+            shifted = midnights + 240. * (longitude - center)  # the reference longitude's sun path at the same hour angle
+            for window, obstacles in zip(windows, candidates):
+                assert window.room is None or len(window.room) > 0
+                for timeInterval in (lambda _coconut_none_coalesce_item: timeIntervals if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(window.room.times):  # use default if nothing defined on room
+                    scores[row, column] += window.room.relevance * timeInterval.weekFactor * float(getDailySunWattages(reference, window, timeInterval, obstacles, shifted, ephemeris, interpolate=True).sum())
+    return scores
+
+
+@_coconut_tco
+def getHouseBatch(houses: 'Iterable[Tuple[Location, _coconut.typing.Sequence[Window], _coconut.typing.Sequence[Obstacle], _coconut.typing.Sequence[TimeInterval]]]') -> 'HouseBatch':
+    ''' Converts house definitions into columns, which need far less memory than value types and are scored without creating objects per element (cf. getBatchHouseScores).
+      houses: location, windows, obstacles and default time intervals per house, as for getHouseScore
+      returns: a HouseBatch value type
+
+  >>> house = (Location(53.4613331, 9.8276266, 20.), [Window(-135., Room(0., 1.), 2.), Window(45., Room(0., .5, [TimeInterval(10., 15.)]), 2.)], [Obstacle(50., 20., 10., 10., .9)], [TimeInterval(7., 9.), TimeInterval(16., 22.5)])
+  >>> batch = getHouseBatch([house, (Location(48., 8.), [], [], [])])
+  >>> batch.windows.tolist(), batch.windowOffsets.tolist(), batch.roomTimeOffsets.tolist()
+  ([(-135.0, 2.0, 0.0, 1.0, False), (45.0, 2.0, 0.0, 0.5, True)], [0, 2, 2], [0, 0, 1])
+  >>> getBatchHouse(batch, 0) == house, getBatchHouse(batch, 1)
+  (True, (Location(latitude=48.0, longitude=8.0, elevation=0.0), [], [], []))
+  '''
+    locations = []  # type: _coconut.typing.Sequence[Tuple[float, ...]]
+    windows = []  # type: _coconut.typing.Sequence[Tuple[float, ...]]
+    obstacles = []  # type: _coconut.typing.Sequence[Tuple[float, ...]]
+    times = []  # type: _coconut.typing.Sequence[Tuple[float, ...]]
+    roomTimes = []  # type: _coconut.typing.Sequence[Tuple[float, ...]]
+    windowOffsets, obstacleOffsets, timeOffsets, roomTimeOffsets = [0], [0], [0], [0]
+    for location, houseWindows, houseObstacles, houseTimes in houses:
+        locations.append(tuple(location))
+        for window in houseWindows:
+            windows.append((window.direction, window.stretch, window.room.elevation, window.room.relevance, window.room.times is not None))
+            roomTimes.extend((tuple(timeInterval) for timeInterval in (lambda _coconut_none_coalesce_item: [] if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(window.room.times)))
+            roomTimeOffsets.append(len(roomTimes))
+        obstacles.extend((tuple(obstacle) for obstacle in houseObstacles))
+        times.extend((tuple(timeInterval) for timeInterval in houseTimes))
+        windowOffsets.append(len(windows))
+        obstacleOffsets.append(len(obstacles))
+        timeOffsets.append(len(times))
+    return _coconut_tail_call(HouseBatch, numpy.array(locations, dtype=LOCATION_DTYPE), numpy.array(windows, dtype=WINDOW_DTYPE), numpy.array(windowOffsets), numpy.array(obstacles, dtype=OBSTACLE_DTYPE), numpy.array(obstacleOffsets), numpy.array(times, dtype=TIME_DTYPE), numpy.array(timeOffsets), numpy.array(roomTimes, dtype=TIME_DTYPE), numpy.array(roomTimeOffsets))
+
+
+def getBatchHouse(batch: 'HouseBatch', house: 'int') -> 'Tuple[Location, _coconut.typing.Sequence[Window], _coconut.typing.Sequence[Obstacle], _coconut.typing.Sequence[TimeInterval]]':
+    ''' Converts one house of a batch back into value types (cf. getHouseBatch).
+      returns: location, windows, obstacles and default time intervals, as for getHouseScore
+  '''
+    first = int(batch.windowOffsets[house])  # type: int
+    windows = [Window(direction, Room(elevation, relevance, [TimeInterval(*timeInterval) for timeInterval in batch.roomTimes[batch.roomTimeOffsets[index]:batch.roomTimeOffsets[index + 1]].tolist()] if ownTimes else None), stretch) for index, (direction, stretch, elevation, relevance, ownTimes) in enumerate(batch.windows[first:batch.windowOffsets[house + 1]].tolist(), first)]  # type: _coconut.typing.Sequence[Window]
+    return (Location(*batch.locations[house].tolist()), windows, [Obstacle(*obstacle) for obstacle in batch.obstacles[batch.obstacleOffsets[house]:batch.obstacleOffsets[house + 1]].tolist()], [TimeInterval(*timeInterval) for timeInterval in batch.times[batch.timeOffsets[house]:batch.timeOffsets[house + 1]].tolist()])
+
+
+@_coconut_tco
+def getHouseBatchSlice(batch: 'HouseBatch', start: 'int', stop: 'int') -> 'HouseBatch':
+    ''' returns: a HouseBatch of the houses from start to stop (exclusive), sharing the columns' memory with the batch '''
+    stop = min(stop, len(batch.locations))
+    windowStart, windowStop = batch.windowOffsets[start], batch.windowOffsets[stop]
+    return _coconut_tail_call(HouseBatch, batch.locations[start:stop], batch.windows[windowStart:windowStop], batch.windowOffsets[start:stop + 1] - windowStart, batch.obstacles[batch.obstacleOffsets[start]:batch.obstacleOffsets[stop]], batch.obstacleOffsets[start:stop + 1] - batch.obstacleOffsets[start], batch.times[batch.timeOffsets[start]:batch.timeOffsets[stop]], batch.timeOffsets[start:stop + 1] - batch.timeOffsets[start], batch.roomTimes[batch.roomTimeOffsets[windowStart]:batch.roomTimeOffsets[windowStop]], batch.roomTimeOffsets[windowStart:windowStop + 1] - batch.roomTimeOffsets[windowStart])
+
+
+@_coconut_tco
+def getBatchHouseScores(batch: 'HouseBatch', timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, store: '_coconut.typing.Optional[str]'=None, executor: '_coconut.typing.Optional[concurrent.futures.Executor]'=None) -> 'numpy.ndarray':
+    ''' Scores all houses of a batch (cf. getHouseScore), reading windows, obstacles and time intervals directly from its columns.
+      Obstacles are compiled and selected per window by array operations (cf. compileObstacles and getShadowFactors), and each time interval's sun path is looked up once per house and shared by its windows.
+      executor: optional process or thread pool to score chunks of BATCH_CHUNK houses in parallel
+      returns: array of scores, one per house, equal to getHouseScore up to rounding
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> houses = [(location, [Window(-135., Room(0., 1.), 2.), Window(45., Room(0., .5), 2.), Window(-45., Room(0., .5), .3)], [Obstacle(50, 20, 10, 10, .9), Obstacle(-5, 30, 5, 4, .9), Obstacle(-45, 10, 10, 10, .9), Obstacle(-135, 15, 10, 10, .8)], times),
+  ...           (location, [Window(-80., Room(0., 1.), 2.), Window(100., Room(4., .5, [TimeInterval(10., 15.)]), 2.)], [Obstacle(100, 10, 50, 15, .4), Obstacle(-95, 20, 8, 8, .9)], times)]
+  >>> scores = getBatchHouseScores(getHouseBatch(houses), timezone = pytz.timezone("Europe/Berlin"))
+  >>> print(numpy.round(scores, 4), all(abs(score - getHouseScore(*house, timezone = pytz.timezone("Europe/Berlin"))) < 1e-9 * score for score, house in zip(scores, houses)))
+  [52799.2992 63682.6021] True
+  >>> with concurrent.futures.ThreadPoolExecutor(2) as executor: print(numpy.array_equal(getBatchHouseScores(getHouseBatch(houses * 40), pytz.timezone("Europe/Berlin"), executor = executor), numpy.tile(scores, 40)))
+  True
+  '''
+    if executor is not None:
+        return _coconut_tail_call(numpy.concatenate, [numpy.zeros(0)] + [future.result() for future in [executor.submit(getBatchHouseScores, getHouseBatchSlice(batch, start, start + BATCH_CHUNK), timezone, time_dst, store) for start in range(0, len(batch.locations), BATCH_CHUNK)]])
+    midnights = getMidnights(REF_YEAR, timezone, time_dst)
+    scores = numpy.zeros(len(batch.locations))
+    for house in range(len(batch.locations)):
+        location = Location(*batch.locations[house].tolist())
+        ephemeris = getEphemeris(location, store=store, executor=None)  # type: Ephemeris  # same arguments as getHouseScore, sharing its memoized ephemeris
+        obstacles = batch.obstacles[batch.obstacleOffsets[house]:batch.obstacleOffsets[house + 1]]
+        horizontalAngles = compileObstacles(obstacles)[0]  # independent of the window elevation
+        verticalAngles = {}  # type: Dict[float, numpy.ndarray]  # per window elevation
+        paths = {}  # type: Dict[Tuple[float, float], _coconut.typing.Optional[SunPath]]  # per time interval
+        for index in range(batch.windowOffsets[house], batch.windowOffsets[house + 1]):
+            direction, stretch, elevation, relevance, ownTimes = batch.windows[index].tolist()
+            if elevation not in verticalAngles:
+                verticalAngles[elevation] = compileObstacles(obstacles, elevation)[1]
+            times = batch.roomTimes[batch.roomTimeOffsets[index]:batch.roomTimeOffsets[index + 1]] if ownTimes else batch.times[batch.timeOffsets[house]:batch.timeOffsets[house + 1]]  # use default if nothing defined on room
+            for fromHour, toHour, weekFactor in times.tolist():
+                norm = (60. / MINUTE_STEPS) * (toHour - fromHour)  # type: float
+                if norm == 0.:
+                    continue
+                timestamps = midnights[:, None] + 60. * getSampleMinutes(TimeInterval(fromHour, toHour))[None, :]  # one row per day
+                if (fromHour, toHour) not in paths:
+                    paths[(fromHour, toHour)] = lookupSunPath(ephemeris, timestamps)
+                path = (lambda _coconut_none_coalesce_item: getDaylightSunPath(location, timestamps, elevation) if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(paths[(fromHour, toHour)])  # type: SunPath
+                wattage = getIncidentWattages(path, direction, stretch)
+                with timing("shadowing"):
+                    shadowFactor = getShadowFactors(numpy.where(wattage > 0., path.altitude, 0.), direction, obstacles["direction"], horizontalAngles, verticalAngles[elevation], obstacles["opacity"])
+                scores[house] += relevance * (weekFactor * float(((wattage * shadowFactor).sum(axis=1) / norm).sum()))
+    return scores
+
+class HouseScorer:
+    ''' Stateful house score (cf. getHouseScore) for interactive editing: windows, obstacles and default time intervals may be changed in place between calls of score().
+      Each contribution of a window and time interval is cached with the set of candidate obstacles it was computed with (cf. getCandidateObstacles).
+      After an edit, only contributions are recomputed whose window direction, stretch, floor elevation, time interval or candidate obstacles changed.
+      Relevance changes and edits of obstacles out of a window's sight don't require any recomputation. Results equal getHouseScore exactly.
+      Changing the location, timezones, store or tolerance recomputes all contributions.
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> windows = [Window(-135., Room(0., 1.), 2.), Window(45., Room(0, .5), 2.), Window(-45., Room(0., .5), .3)]
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> obstacles = [Obstacle(50, 20, 10, 10, .9), Obstacle(-5, 30, 5, 4, .9), Obstacle(-45, 10, 10, 10, .9), Obstacle(-135, 15, 10, 10, .8)]
+  >>> scorer = HouseScorer(location, windows, obstacles, times, timezone = pytz.timezone("Europe/Berlin"))
+  >>> print(round(scorer.score(), 4), scorer.computed)
+  52799.2992 9
+  >>> scorer.obstacles[1] = Obstacle(-5, 30, 5, 8, .9)  # higher obstacle in the south, out of sight of all windows
+  >>> scorer.windows[0] = scorer.windows[0]._replace(room = Room(0., .8))  # less relevant living room
+  >>> print(round(scorer.score(), 4), scorer.computed)
+  52483.6854 0
+  >>> scorer.obstacles.append(Obstacle(40, 10, 10, 10, .5))  # new obstacle in front of the kitchen window
+  >>> scorer.windows[2] = scorer.windows[2]._replace(stretch = .5)
+  >>> print(round(scorer.score(), 4), scorer.computed)
+  46075.525 6
+  >>> scorer.score() == getHouseScore(location, scorer.windows, scorer.obstacles, times, timezone = pytz.timezone("Europe/Berlin"))
+  True
+  >>> scorer.timezone = UTC
+  >>> print(scorer.score() == getHouseScore(location, scorer.windows, scorer.obstacles, times), scorer.computed)
+  True 9
+  '''
+    def __init__(_, location: 'Location', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, store: '_coconut.typing.Optional[str]'=None, tolerance: '_coconut.typing.Optional[float]'=None) -> 'None':
+        _.location, _.timezone, _.time_dst, _.store, _.tolerance = location, timezone, time_dst, store, tolerance
+        _.windows, _.obstacles, _.timeIntervals = list(windows), list(obstacles), list(timeIntervals)  # may be edited in place
+        _.contributions = {}  # type: Dict[Any, Tuple[FrozenSet[Any], float]]
+        _.settings = None  # type: Any  # key of the attributes all contributions depend on, cf. getSettings
+        _.indexed = None  # type: Optional[Tuple[Obstacle, ...]]
+        _.index = None  # type: Optional[ObstacleIndex]
+        _.computed = 0  # number of contributions computed by the last call of score()
+    def getIndex(_) -> 'ObstacleIndex':
+        ''' returns: the obstacle index, rebuilt only if the obstacles changed since the last call '''
+        if _.indexed != tuple(_.obstacles):
+            _.indexed, _.index = tuple(_.obstacles), getObstacleIndex(_.obstacles)
+        assert _.index is not None
+        return _.index
+    def getSettings(_) -> 'Any':
+        return (getCacheKey(_.location), getTimezoneName(_.timezone), getTimezoneName(_.time_dst), _.store, _.tolerance)
+    @timed("houseScore")
+    def score(_) -> 'float':
+        ''' Computes the contributions that aren't cached yet, and drops the cached ones no longer used.
+        returns: a score >= 0, same as getHouseScore
+    '''
+        ephemeris = getEphemeris(_.location, store=_.store, executor=None) if _.tolerance is None else None  # type: _coconut.typing.Optional[Ephemeris]  # same arguments as getHouseScore, sharing its memoized ephemeris
+        index = _.getIndex()  # type: ObstacleIndex
+        if _.getSettings() != _.settings:  # e.g. another location
+            _.settings, _.contributions = _.getSettings(), {}  # e.g. another location
+        contributions = {}  # type: Dict[Any, Tuple[FrozenSet[Any], float]]
+        amount = 0.  # type: float
+        _.computed = 0
+        for window in _.windows:
+            assert window.room is None or len(window.room) > 0
+            candidates = getCandidateObstacles(index, window.direction)  # type: _coconut.typing.Sequence[Obstacle]
+            dependencies = frozenset((getCacheKey(obstacle) for obstacle in candidates))  # type: FrozenSet[Any]  # the shadowing minimum doesn't depend on the obstacles' order
+            for timeInterval in (lambda _coconut_none_coalesce_item: _.timeIntervals if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(window.room.times):  # use default if nothing defined on room
+                key = (window.direction, window.stretch, window.room.elevation, getCacheKey(timeInterval))
+                cached = (lambda _coconut_none_coalesce_item: _.contributions.get(key) if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(contributions.get(key))
+                if cached is None or cached[0] != dependencies:
+                    countEvent("contributionMisses")
+                    _.computed += 1
+                    cached = (dependencies, getDailySunWattageSumForEntireYear(_.location, window, timeInterval, [compileObstacle(obstacle, window.room.elevation) for obstacle in candidates], timezone=_.timezone, time_dst=_.time_dst, ephemeris=ephemeris, tolerance=_.tolerance))
+                else:
+                    countEvent("contributionHits")
+                contributions[key] = cached
+                amount += window.room.relevance * cached[1]
+        _.contributions = contributions
+        return amount
+
+
+@memoize
+def getLibraryVersion() -> 'str':
+    ''' returns: hash of this module's source, which changes with any change of the scoring code '''
+    with open(__file__, "rb") as fd:
+        return hashlib.sha256(fd.read()).hexdigest()[:16]
+
+
+def getTimezoneName(timezone: '_coconut.typing.Optional[Timezone]') -> '_coconut.typing.Optional[str]':  # pytz timezones by name, fixed timezones by offset
+    return None if timezone is None else str(getattr(timezone, "zone", timezone))  # pytz timezones by name, fixed timezones by offset
+
+
+@_coconut_tco
+def getResultKey(location: 'Location', windows: '_coconut.typing.Sequence[Window]', obstacles: '_coconut.typing.Sequence[Obstacle]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, tolerance: '_coconut.typing.Optional[float]'=None, day_step: '_coconut.typing.Optional[int]'=None, horizon: 'bool'=False, years: '_coconut.typing.Optional[_coconut.typing.Sequence[int]]'=None) -> 'str':
+    ''' Computes a canonical hash of all inputs of getHouseScore that change its result, of the sampling step and of this module's version (cf. getLibraryVersion).
+      Numbers are compared as floats, and obstacles are sorted, because their order doesn't change the score.
+      returns: hexadecimal SHA-256 digest
+
+  >>> windows = [Window(-135., Room(0., 1., [TimeInterval(10, 15)]), 2.)]
+  >>> getResultKey(Location(53.5, 9.8), windows, [Obstacle(50, 20, 10, 10), Obstacle(-5, 30, 5, 4)]) == getResultKey(Location(53.5, 9.8, 0), windows, [Obstacle(-5., 30., 5., 4.), Obstacle(50., 20., 10., 10., 1.)])
+  True
+  >>> getResultKey(Location(53.5, 9.8), windows, [], timezone = pytz.timezone("Europe/Berlin")) == getResultKey(Location(53.5, 9.8), windows, [], timezone = mktz(1.))
+  False
+  '''
+    floats = lambda values: [float(value) for value in values]
+    description = {"version": getLibraryVersion(), "location": floats(location), "windows": [[float(window.direction), float(window.stretch), float(window.room.elevation), float(window.room.relevance), [floats(times) for times in window.room.times] if window.room.times is not None else None] for window in windows], "obstacles": sorted((floats(obstacle) for obstacle in obstacles)), "times": [floats(times) for times in timeIntervals], "timezone": getTimezoneName(timezone), "time_dst": getTimezoneName(time_dst), "years": ([REF_YEAR] if years is None else years), "minute_steps": MINUTE_STEPS, "tolerance": tolerance, "day_step": day_step, "horizon": horizon}  # type: Dict[str, Any]
+    return _coconut_tail_call(hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest)
+
+
+class ResultStore:
+    ''' Persistent content-addressed cache of house scores (cf. getResultKey) in an SQLite database, e.g. to reuse scores across nightly runs and user sessions.
+      Several threads and processes may share a store: each call uses its own connection and transaction, and writers wait for each other (cf. RESULT_STORE_TIMEOUT).
+      Lookups only read, without waiting for writers, except for recording the access time of a hit once per RESULT_STORE_TOUCH.
+      Beyond maxbytes (estimated, cf. RESULT_ROW_BYTES), the least recently used quarter of the scores is evicted.
+      directory: created if missing
+      maxbytes: maximum estimated size of all entries
+
+  >>> import tempfile
+  >>> with tempfile.TemporaryDirectory() as directory:
+  ...   results = ResultStore(directory, maxbytes = 1 << 12)
+  ...   print(results.get("a"), results.put("a", 1.5), results.get("a"))
+  ...   for key in range(200): _ = results.put(str(key), float(key))
+  ...   info = results.info()
+  ...   print(info.evictions > 0, info.size < 200, info.bytes <= 1 << 12, results.get("199"), results.get("0"), ResultStore(directory).get("199"))
+  None 1.5 1.5
+  True True True 199.0 None 199.0
+  >>> with tempfile.TemporaryDirectory() as directory:
+  ...   results = ResultStore(directory)
+  ...   _ = results.put("a", 1.5)
+  ...   writer = sqlite3.connect(os.path.join(directory, RESULT_STORE_FILE), isolation_level = None)
+  ...   _ = writer.execute("BEGIN IMMEDIATE")  # another process writing
+  ...   print(results.get("a"), results.info().size)  # doesn't wait for it
+  ...   writer.close()
+  1.5 1
+  '''
+    def __init__(_, directory: 'str', maxbytes: 'int'=RESULT_STORE_BYTES) -> 'None':
+        _.directory, _.maxbytes = directory, maxbytes
+        _.hits = _.misses = _.evictions = 0  # of this instance
+        os.makedirs(directory, exist_ok=True)
+        with _.connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, score REAL NOT NULL, used REAL NOT NULL, bytes INTEGER NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")  # for eviction
+            db.execute("CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)")  # totals, kept up to date by each transaction
+            db.execute("INSERT OR IGNORE INTO usage VALUES (0, 0, 0)")
+    @contextlib.contextmanager
+    def connect(_, write: 'bool'=True) -> 'Iterator[Any]':
+        ''' Opens a connection with one transaction, which locks the database for writing up front, so that concurrent writers wait instead of failing.
+        write: if false, a read-only transaction, which sees the last committed state and neither waits for writers nor blocks them (write-ahead log)
+    '''
+        db = sqlite3.connect(os.path.join(_.directory, RESULT_STORE_FILE), timeout=RESULT_STORE_TIMEOUT, isolation_level=None)  # explicit transactions
+        try:
+            if db.execute("PRAGMA journal_mode").fetchone()[0] != "wal":  # faster commits; persistent in the database file
+                db.execute("PRAGMA journal_mode = WAL")  # faster commits; persistent in the database file
+            db.execute("BEGIN IMMEDIATE" if write else "BEGIN DEFERRED")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+    def get(_, key: 'str') -> '_coconut.typing.Optional[float]':
+        ''' returns: the stored score, or None if missing '''
+        with _.connect(write=False) as db:
+            row = db.execute("SELECT score, used FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None and row[1] < time.time() - RESULT_STORE_TOUCH:  # for eviction
+            with _.connect() as db:
+                db.execute("UPDATE results SET used = ? WHERE key = ? AND used < ?", (time.time(), key, time.time() - RESULT_STORE_TOUCH))
+        if row is None:
+            _.misses += 1
+            countEvent("resultStoreMisses")
+            return None
+        _.hits += 1
+        countEvent("resultStoreHits")
+        return row[0]
+    def put(_, key: 'str', score: 'float') -> 'float':
+        ''' Stores a score, evicting the least recently used scores beyond maxbytes.
+        returns: the score
+    '''
+        size = 2 * len(key.encode("utf-8")) + RESULT_ROW_BYTES  # type: int
+        with _.connect() as db:
+            if db.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is None:
+                db.execute("UPDATE usage SET entries = entries + 1, bytes = bytes + ?", (size,))
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, score, time.time(), size))
+            entries, total = db.execute("SELECT entries, bytes FROM usage").fetchone()
+            if total > _.maxbytes:
+                oldest = max(1, entries // 4)  # type: int  # evicting several entries at once amortizes the eviction query
+                evicted = db.execute("SELECT COUNT(*), SUM(bytes) FROM (SELECT bytes FROM results ORDER BY used LIMIT ?)", (oldest,)).fetchone()
+                db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)", (oldest,))
+                db.execute("UPDATE usage SET entries = entries - ?, bytes = bytes - ?", evicted)
+                _.evictions += evicted[0]
+        return score
+    def clear(_) -> 'None':
+        with _.connect() as db:
+            db.execute("DELETE FROM results")
+            db.execute("UPDATE usage SET entries = 0, bytes = 0")
+    @_coconut_tco
+    def info(_) -> 'CacheInfo':
+        ''' returns: hits, misses and evictions of this instance, and the number and estimated bytes of all stored scores '''
+        with _.connect(write=False) as db:
+            entries, total = db.execute("SELECT entries, bytes FROM usage").fetchone()
+        return _coconut_tail_call(CacheInfo, _.hits, _.misses, _.evictions, entries, total)
+
+@memoize(maxsize=None)  # never drop running pools
+@_coconut_tco  # never drop running pools
+def getProcessPool(processes: '_coconut.typing.Optional[int]'=None) -> 'concurrent.futures.Executor':  # never drop running pools
+    return _coconut_tail_call(concurrent.futures.ProcessPoolExecutor, processes)  # persistent workers, reused by all calls with the same number of processes
+
+@memoize(maxsize=None)
+def getTemporaryStore() -> 'str':
+    ''' Creates a temporary ephemeris store directory for this process, which is removed at exit. '''
+    import atexit  # only needed here, not imported with this module
+    import shutil  # only needed here, not imported with this module
+    import tempfile  # only needed here, not imported with this module
+    store = tempfile.mkdtemp(prefix="rese_")  # type: str
+    atexit.register(shutil.rmtree, store, True)
+    return store
+
+
+def compareHouses(location: 'Location', houses: 'Dict[str, Tuple[List[Window], List[Obstacle]]]', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, processes: '_coconut.typing.Optional[int]'=None) -> 'List[Tuple[str, float]]':
+    ''' Computes the scores of several house options at the same location in parallel on a pool of persistent worker processes.
+      The location's ephemeris is computed once and memory-mapped by all workers via the ephemeris store (EPHEMERIS_STORE, or a temporary directory).
+      houses: mapping of house option names to (windows, obstacles) tuples
+      processes: number of worker processes (default: number of CPUs)
+      returns: list of (name, score) tuples, sorted by name
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> houses = {"B": ([Window(-80., Room(0., 1.), 2.), Window(100., Room(0., .5), 2.)], [Obstacle(100, 10, 50, 15, .4), Obstacle(-95, 20, 8, 8, .9)]),
+  ...           "A": ([Window(-135., Room(0., 1.), 2.), Window(45., Room(0., .5), 2.)], [Obstacle(50, 20, 10, 10, .9), Obstacle(-135, 15, 10, 10, .8)])}
+  >>> scores = compareHouses(location, houses, times, timezone = pytz.timezone("Europe/Berlin"), processes = 2)
+  >>> print([(name, round(score, 4)) for name, score in scores])
+  [('A', 16689.5277), ('B', 91527.6138)]
+  >>> print(scores[1][1] == getHouseScore(location, houses["B"][0], houses["B"][1], times, timezone = pytz.timezone("Europe/Berlin")))
+  True
+  '''
+    store = (lambda _coconut_none_coalesce_item: getTemporaryStore() if _coconut_none_coalesce_item is None else _coconut_none_coalesce_item)(EPHEMERIS_STORE)  # type: str
+    if not os.path.exists(os.path.join(store, getEphemerisFilename(location))):
+        precomputeEphemeris(location, store)
+    pool = getProcessPool(processes)
+    futures = [(name, pool.submit(getHouseScore, location, windows, obstacles, timeIntervals, timezone, time_dst, store)) for name, (windows, obstacles) in sorted(houses.items())]
+    return [(name, future.result()) for name, future in futures]
+
+
+def rankHouses(location: 'Location', houses: 'Dict[str, Tuple[List[Window], List[Obstacle]]]', k: 'int', timeIntervals: '_coconut.typing.Sequence[TimeInterval]'=[], timezone: 'Timezone'=UTC, time_dst: '_coconut.typing.Optional[Timezone]'=None, day_step: 'int'=DAY_STEP, store: '_coconut.typing.Optional[str]'=None, cache: '_coconut.typing.Optional[ResultStore]'=None, bound_errors: '_coconut.typing.Optional[float]'=None) -> 'List[Tuple[str, float]]':
+    ''' Finds the k best of several house options at the same location with their exact scores (cf. getHouseScore), without computing most other options exactly.
+      Each option gets an upper bound of its score. Options are then scored exactly in order of their upper bounds, until the k-th best exact score exceeds the upper bound of all remaining options.
+      By default, the upper bound is the option's unobstructed score, as obstacles only ever reduce a score; the ranking is exact, but bounding costs about as much as scoring without obstacles
+      (options with the same windows share it).
+      bound_errors: if given, the upper bound is instead the estimate from representative days (cf. estimateHouseScore) plus this many estimated errors, at least BOUND_TOLERANCE of the estimate (e.g. BOUND_ERRORS).
+                    This is much cheaper, but the ranking is approximate: an option whose score exceeds its estimate by more is missed without notice.
+      houses: mapping of house option names to (windows, obstacles) tuples
+      cache: optional persistent result store for the exact scores (cf. ResultStore)
+      k: number of best options to find, at least zero
+      returns: list of up to k (name, score) tuples, best first (ties by name)
+
+  >>> location = Location(53.4613331, 9.8276266, 20.)
+  >>> times = [TimeInterval(7., 9., 7./7.), TimeInterval(16., 22.5, 7/7.), TimeInterval(9., 16., 2./7)]
+  >>> houses = {"{:03d}".format(direction): ([Window(float(direction), Room(0., 1.), 2.), Window(direction + 90., Room(3., .5), 1.)], [Obstacle(direction + 10., 20., 10., 10., .9)]) for direction in range(-180, 180, 30)}
+  >>> with instrument() as statistics: ranking = rankHouses(location, houses, 3, times, pytz.timezone("Europe/Berlin"))
+  >>> print([(name, round(score, 4)) for name, score in ranking], statistics.counts["exactScores"], statistics.counts["boundScores"])
+  [('-60', 117200.3789), ('-30', 109416.5232), ('000', 98655.1081)] 6 12
+  >>> ranking == sorted(((name, getHouseScore(location, windows, obstacles, times, pytz.timezone("Europe/Berlin"))) for name, (windows, obstacles) in houses.items()), key = lambda item: -item[1])[:3]  # all options scored exactly
+  True
+  >>> with instrument() as statistics: approximate = rankHouses(location, houses, 3, times, pytz.timezone("Europe/Berlin"), bound_errors = BOUND_ERRORS)
+  >>> approximate == ranking, statistics.counts["exactScores"]  # the estimates' bounds hold here
+  (True, 3)
+  >>> rankHouses(location, houses, 0, times), rankHouses(location, {name: houses[name] for name in ("000", "-60")}, 5, times, pytz.timezone("Europe/Berlin")) == ranking[::2]  # all options for k > len(houses)
+  ([], True)
+  >>> rankHouses(location, houses, -1, times)
+  Traceback (most recent call last):
+  ...
+  ValueError: k must be at least zero, not -1
+  '''
+    if k < 0:
+        raise ValueError("k must be at least zero, not {}".format(k))
+    if k == 0:
+        return []
+    bounds = {}  # type: Dict[str, float]
+    unobstructed = {}  # type: Dict[Any, float]  # by windows
+    for name, (windows, obstacles) in houses.items():
+        if bound_errors is not None:
+            estimate, error = estimateHouseScore(location, windows, obstacles, timeIntervals, timezone, time_dst, day_step, store)
+            bounds[name] = estimate + max(bound_errors * error, BOUND_TOLERANCE * estimate)
+            continue
+        key = getCacheKey(windows)
+        if key not in unobstructed:
+            countEvent("boundScores")
+            unobstructed[key] = getHouseScore(location, windows, [], timeIntervals, timezone, time_dst, store)
+        bounds[name] = unobstructed[key]
+    scores = {}  # type: Dict[str, float]
+    best = []  # type: _coconut.typing.Sequence[float]  # heap of the k best exact scores so far, the k-th best first
+    for name in sorted(bounds, key=lambda name: (-bounds[name], name)):
+        if len(best) >= k and best[0] > bounds[name]:  # no remaining option can reach the top k, also not by a tie won by name
+            break  # no remaining option can reach the top k, also not by a tie won by name
+        countEvent("exactScores")
+        windows, obstacles = houses[name]
+        scores[name] = getHouseScore(location, windows, obstacles, timeIntervals, timezone, time_dst, store, cache=cache)
+        (heapq.heappush if len(best) < k else heapq.heappushpop)(best, scores[name])
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
 if __name__ == '__main__':
     sys = _coconut_sys
     if '--test' in sys.argv:
         import doctest
         import pytz
         doctest.testmod()
+    if '--precompute' in sys.argv:  # --precompute <latitude> <longitude> <elevation> <store directory>
+        latitude, longitude, elevation, store = sys.argv[sys.argv.index('--precompute') + 1:][:4]
+        (print)(precomputeEphemeris(Location(float(latitude), float(longitude), float(elevation)), store))
@@ -22,7 +22,7 @@ setup(
   version = versionString,  # without extra
   description = "RESE - Real estate sunlight estimator",
   long_description = "",  # TODO readme excerpt
-  install_requires = ["mypy", "pysolar", "pytz"],  # mypy is actually just for testing
+  install_requires = ["mypy", "numpy", "pysolar>=0.7,<0.8", "pytz"],  # mypy is actually just for testing; the sun path computation ports pysolar 0.7 (cf. getSunPath)
   python_requires = '>=3.0',
   classifiers = [c.strip() for c in """
         Development Status :: 5 - Production/Stable
@@ -46,6 +46,7 @@ setup(
   url = 'http://github.com/ArneBachmann/realestate-sunamount',
   license = 'Mozilla Public License Version 2.0 (MPL-2.0)',
   packages = find_packages(),  # should return ["rese"]
+  entry_points = {"console_scripts": ["rese = rese.cli:main", "rese-server = rese.server:main"]},  # streaming batch scoring and scoring server, cf. rese/cli.coco and rese/server.coco
   package_dir = {"rese": "rese"},
   package_data = {"rese": ["../LICENSE", "../*.md", "*.coco"]},
   include_package_data = False,  # if True, will *NOT* package the data!